@@ -0,0 +1,228 @@
+# Measures how TabuCol and Control scale with the size of the graph, so that a
+# change which slows down the search shows up as a change in the fitted scaling
+# exponents rather than only being noticed by chance.
+#
+# Usage:
+#   python benchmark.py run --ns 100 100000 --steps 7 --ratios 1.5 2.0 2.2
+#   python benchmark.py report --plot
+import os
+import time
+import math
+import argparse
+import contextlib
+import numpy as np
+import pandas as pd
+
+from graph import Graph, canonicalize_edges
+from tabucol import TabuCol
+from control import Control
+from rng import default_rng, spawn
+
+ALGORITHMS = {'tabucol':TabuCol, 'control':Control}
+
+def planted_graph(k, n, ratio, seed=None):
+    '''
+    Generates a random graph with n vertices and about ratio * n edges which is
+    k-colorable by construction. Each vertex is given a hidden color, and
+    random pairs of vertices are joined only if their hidden colors differ.
+    This takes O(m log m), so unlike generate_colorable_graph it doesn't need
+    a SAT check, which would be far too slow for the larger graphs.
+
+    Params
+    ------
+    k : int
+        The number of colors the graph must be colorable with.
+    n : int
+        The number of vertices.
+    ratio : float
+        The edge-vertex ratio. For k = 3, graphs are hardest to color at a
+        ratio of around 2.3.
+    seed : None, int, or numpy.random.Generator
+        Seed for the random number generator used to draw the graph.
+    '''
+    rng = default_rng(seed)
+    hidden = rng.integers(0, k, size=n)
+    # Draw enough pairs that about ratio * n are left after the ones within a
+    # hidden coloring group (and any duplicates) are dropped.
+    m = int(ratio * n * k / (k - 1) * 1.05)
+    E = rng.integers(0, n, size=(m, 2))
+    E = canonicalize_edges(E[hidden[E[:, 0]] != hidden[E[:, 1]]])
+    E = E[rng.permutation(len(E))[:int(ratio * n)]]
+    return Graph.from_arrays(E[:, 0], E[:, 1], n)
+
+def time_run(algorithm, G, k, seed, maxiters, T_size, rep):
+    '''
+    Runs the algorithm once, with its progress messages discarded, and returns
+    a dictionary of measurements. Iterations per second are only given for
+    runs whose number of iterations is known, i.e. ones which did not get
+    stuck.
+    '''
+    solver = ALGORITHMS[algorithm](G, k, seed=seed)
+    kwargs = {'maxiters':maxiters, 'rep':rep}
+    if algorithm == 'tabucol':
+        kwargs.update({'T_size':T_size, 'check_bound':False})
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        result = solver.run(**kwargs)
+        elapsed = time.perf_counter() - start
+
+    iters = result if result >= 0 else (maxiters if result == -2 else np.nan)
+    return {'result':result,
+            'success':result >= 0,
+            'seconds':elapsed,
+            'iters':iters,
+            'iters_per_sec':iters / elapsed if elapsed > 0 else np.nan,
+            'graph_bytes':G.memory_report()['total'],
+            'table_bytes':solver.evaluator.table.nbytes}
+
+def run_benchmark(ns, ratios, ks, algorithms=('tabucol', 'control'), trials=5, maxiters=100000, T_size=7, rep=50, seed=None):
+    '''
+    Runs each algorithm on trials planted graphs for every combination of n,
+    ratio and k, and returns a DataFrame with one row per run.
+
+    Params
+    ------
+    ns : list
+        The numbers of vertices to run on.
+    ratios : list
+        The edge-vertex ratios to run on.
+    ks : list
+        The numbers of colors to run with.
+    algorithms : list
+        The names of the algorithms to run, from ALGORITHMS.
+    trials : int
+        The number of graphs generated for each combination.
+    maxiters : int
+        The iteration limit for each run.
+    T_size : int
+        The size of the Tabu list used by TabuCol.
+    rep : int
+        The number of neighbors considered at each iteration.
+    seed : None, int, or numpy.random.Generator
+        Seed from which the graphs and runs are drawn.
+    '''
+    rows = []
+    points = [(n, ratio, k) for n in ns for ratio in ratios for k in ks]
+    for (n, ratio, k), rng in zip(points, spawn(seed, len(points))):
+        # Each trial gets one stream for its graph, and one for each algorithm.
+        seeds = spawn(rng, (len(algorithms) + 1) * trials)
+        for trial in range(trials):
+            graph_rng, *run_rngs = seeds[trial * (len(algorithms) + 1):(trial + 1) * (len(algorithms) + 1)]
+            G = planted_graph(k, n, ratio, seed=graph_rng)
+            for algorithm, run_rng in zip(algorithms, run_rngs):
+                row = {'algorithm':algorithm, 'n':n, 'm':G.edge_count, 'ratio':ratio, 'k':k, 'trial':trial}
+                row.update(time_run(algorithm, G, k, run_rng, maxiters, T_size, rep))
+                rows.append(row)
+                print(f"{algorithm} n={n} ratio={ratio} k={k} trial={trial}: {row['seconds']:.3f}s, {row['iters_per_sec']:.0f} iters/sec, result {row['result']}")
+    return pd.DataFrame(rows)
+
+def summarize(df):
+    '''
+    Summarizes the runs in df for each algorithm, n, ratio and k: the success
+    rate, the quartiles of the time to solution over successful runs, the
+    median iterations per second, and the memory used.
+    '''
+    groups = df.groupby(['algorithm', 'ratio', 'k', 'n'])
+    solved = df[df['success']].groupby(['algorithm', 'ratio', 'k', 'n'])['seconds']
+    summary = pd.DataFrame({
+        'runs':groups.size(),
+        'success_rate':groups['success'].mean(),
+        'tts_q25':solved.quantile(0.25),
+        'tts_median':solved.median(),
+        'tts_q75':solved.quantile(0.75),
+        'iters_per_sec':groups['iters_per_sec'].median(),
+        'graph_bytes':groups['graph_bytes'].max(),
+        'table_bytes':groups['table_bytes'].max()})
+    return summary.reset_index()
+
+def fit_exponents(summary):
+    '''
+    Fits a power law y = a n^b to each measured quantity, for each algorithm,
+    ratio and k, by a least squares fit of log y against log n. Returns a
+    DataFrame of the exponents b. A fit needs at least two values of n.
+
+    The exponent of iters_per_sec is the negative of the exponent of the cost
+    of a single iteration. Moves are evaluated and applied incrementally, but
+    the candidate moves are still generated from every conflicting vertex, so
+    iterations cost O(f) and the exponent is only close to 0 once f is small
+    compared to n. tts_median also includes the growth in the number of
+    iterations needed.
+    '''
+    rows = []
+    for (algorithm, ratio, k), group in summary.groupby(['algorithm', 'ratio', 'k']):
+        row = {'algorithm':algorithm, 'ratio':ratio, 'k':k}
+        for column in ['tts_median', 'iters_per_sec', 'graph_bytes', 'table_bytes']:
+            points = group[(group[column] > 0) & group[column].notna()]
+            if len(points) < 2:
+                row[column] = np.nan
+                continue
+            slope, intercept = np.polyfit(np.log(points['n']), np.log(points[column].astype(float)), 1)
+            row[column] = slope
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def plot_report(summary, path):
+    '''
+    Plots the time to solution and iterations per second against n on log-log
+    axes, with one line per algorithm, ratio and k, and saves the figure.
+    '''
+    import matplotlib.pyplot as plt
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for (algorithm, ratio, k), group in summary.groupby(['algorithm', 'ratio', 'k']):
+        label = f'{algorithm} ratio={ratio} k={k}'
+        axes[0].errorbar(group['n'], group['tts_median'],
+            yerr=[group['tts_median'] - group['tts_q25'], group['tts_q75'] - group['tts_median']], label=label, capsize=3)
+        axes[1].plot(group['n'], group['iters_per_sec'], marker='o', label=label)
+    for ax, title in zip(axes, ['time to solution (s)', 'iterations per second']):
+        ax.set_xscale('log')
+        ax.set_yscale('log')
+        ax.set_xlabel('n')
+        ax.set_title(title)
+    axes[0].legend(fontsize='small')
+    plt.tight_layout()
+    plt.savefig(path)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark how TabuCol and Control scale with graph size.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Run the benchmark and save the raw results.')
+    run.add_argument('--ns', type=int, nargs=2, default=[100, 100000], metavar=('MIN', 'MAX'),
+        help='The smallest and largest numbers of vertices.')
+    run.add_argument('--steps', type=int, default=7, help='The number of log-spaced values of n.')
+    run.add_argument('--ratios', type=float, nargs='+', default=[1.5, 2.0, 2.2], help='The edge-vertex ratios.')
+    run.add_argument('--ks', type=int, nargs='+', default=[3], help='The numbers of colors.')
+    run.add_argument('--algorithms', nargs='+', default=list(ALGORITHMS), choices=list(ALGORITHMS))
+    run.add_argument('--trials', type=int, default=5, help='The number of graphs for each point.')
+    run.add_argument('--maxiters', type=int, default=100000)
+    run.add_argument('--T-size', type=int, default=7)
+    run.add_argument('--rep', type=int, default=50)
+    run.add_argument('--seed', type=int, default=0)
+    run.add_argument('--out', default='./benchmark.csv', help='The file to write the results to.')
+
+    report = commands.add_parser('report', help='Summarize saved results and fit scaling exponents.')
+    report.add_argument('--results', default='./benchmark.csv', help='The file written by the run command.')
+    report.add_argument('--plot', nargs='?', const='./benchmark.png', default=None,
+        help='Also save a log-log plot, to ./benchmark.png by default.')
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        lo, hi = args.ns
+        ns = np.unique(np.round(np.logspace(math.log10(lo), math.log10(hi), args.steps)).astype(int)).tolist()
+        df = run_benchmark(ns, args.ratios, args.ks, algorithms=args.algorithms, trials=args.trials,
+            maxiters=args.maxiters, T_size=args.T_size, rep=args.rep, seed=args.seed)
+        df.to_csv(args.out, index=False)
+        print(f'Results for {len(df)} runs written to {args.out}.')
+    else:
+        df = pd.read_csv(args.results)
+        summary = summarize(df)
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(summary.to_string(index=False))
+            print()
+            print('Scaling exponents (y ~ n^b):')
+            print(fit_exponents(summary).to_string(index=False))
+        if args.plot is not None:
+            plot_report(summary, args.plot)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+# Lower bounds on the chromatic number, used to detect before searching that a
+# coloring with k colors cannot exist. Any clique of size q needs q colors, so
+# a large clique proves that every k < q is infeasible.
+import sys
+import numpy as np
+sys.path.append('./PyMiniSolvers/')
+import minisolvers
+
+from evaluation import popcount
+
+# Graphs with at least this edge density use the bitset adjacency rows to
+# intersect candidate sets, as Graph.has_edge does.
+DENSE_THRESHOLD = 1 / 32
+
+def core_numbers(G):
+    '''
+    Returns a dictionary mapping each vertex of G to its core number, i.e. the
+    largest c such that the vertex belongs to a subgraph with minimum degree c.
+    Uses the O(|V| + |E|) bucket algorithm of Batagelj and Zaversnik, over the
+    CSR adjacency arrays of G.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to compute core numbers for.
+    '''
+    return dict(zip(G.V, _core_array(G).tolist()))
+
+def _core_array(G):
+    '''
+    Returns the core number of each vertex of G, as an array ordered like the
+    vertex labels.
+    '''
+    indptr, indices = G.get_csr()
+    n = G.vertex_count
+    degree = np.diff(indptr).tolist()
+    max_degree = max(degree, default=0)
+
+    # Sort the vertices by degree, using a bucket for each degree value.
+    buckets = [[] for d in range(max_degree + 1)]
+    for v in range(n):
+        buckets[degree[v]].append(v)
+    order = [v for bucket in buckets for v in bucket]
+    position = [0] * n
+    for i, v in enumerate(order):
+        position[v] = i
+    start = [0] * (max_degree + 1)
+    for d in range(1, max_degree + 1):
+        start[d] = start[d - 1] + len(buckets[d - 1])
+
+    for v in order:
+        for u in indices[indptr[v]:indptr[v + 1]].tolist():
+            if degree[u] > degree[v]:
+                # Move u to the front of its bucket, then shrink its degree.
+                du = degree[u]
+                w = order[start[du]]
+                if u != w:
+                    pu, pw = position[u], position[w]
+                    order[pu], order[pw] = w, u
+                    position[u], position[w] = pw, pu
+                start[du] += 1
+                degree[u] -= 1
+    return np.array(degree, dtype=np.int64)
+
+def _cores_to_array(G, cores):
+    '''
+    Converts a dictionary of core numbers to an array ordered like the vertex
+    labels of G, computing them if cores is None.
+    '''
+    if cores is None:
+        return _core_array(G)
+    return np.fromiter((cores[v] for v in G.V), dtype=np.int64, count=G.vertex_count)
+
+def degeneracy(G):
+    '''
+    Returns the degeneracy of G, the largest core number of any vertex. The
+    largest clique in G has at most degeneracy + 1 vertices.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to compute the degeneracy of.
+    '''
+    return max(core_numbers(G).values(), default=0)
+
+def greedy_clique(G, tries=10, cores=None):
+    '''
+    Finds a clique in G using a greedy heuristic. Starting from each of the
+    tries vertices with the highest core numbers, the clique is grown by
+    repeatedly adding the candidate vertex with the most neighbors among the
+    remaining candidates. Returns the largest clique found, as a list.
+
+    On dense graphs the candidates are kept as a bitmask, and counted against
+    the bitset adjacency rows with popcount; otherwise they are kept as a
+    sorted array of indices, and intersected with CSR rows.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to search for a clique.
+    tries : int
+        The number of starting vertices to grow a clique from.
+    cores : dict
+        Core numbers of the vertices of G. These are computed if not given.
+    '''
+    cores = _cores_to_array(G, cores)
+    indptr, indices = G.get_csr()
+    n = G.vertex_count
+    dense = G.density() >= DENSE_THRESHOLD
+    bits = G.get_adjacency_bits() if dense else None
+    starts = np.argsort(-cores, kind='stable')[:tries]
+
+    best = []
+    for v in starts.tolist():
+        # A vertex with core number c can't be in a clique of more than c + 1
+        # vertices, so there is no point growing from it.
+        if cores[v] + 1 <= len(best):
+            continue
+        clique = [v]
+        candidates = indices[indptr[v]:indptr[v + 1]]
+        candidates = candidates[cores[candidates] >= len(best)]
+        if dense:
+            mask = np.zeros(bits.shape[1], dtype=np.uint64)
+            np.bitwise_or.at(mask, candidates // 64, np.left_shift(np.uint64(1), (candidates % 64).astype(np.uint64)))
+        while len(candidates) > 0:
+            if dense:
+                counts = popcount(bits[candidates] & mask).sum(axis=1)
+            else:
+                counts = [np.count_nonzero(np.isin(indices[indptr[u]:indptr[u + 1]], candidates, assume_unique=True))
+                          for u in candidates.tolist()]
+            u = int(candidates[int(np.argmax(counts))])
+            clique.append(u)
+            if dense:
+                mask &= bits[u]
+                candidates = np.flatnonzero(np.unpackbits(mask.view(np.uint8), bitorder='little'))[:n]
+            else:
+                candidates = np.intersect1d(candidates, indices[indptr[u]:indptr[u + 1]], assume_unique=True)
+        if len(clique) > len(best):
+            best = clique
+    return G.labels[best].tolist()
+
+def clique_to_sat(G, q, cores=None):
+    '''
+    Converts the question "does G contain a clique of q vertices?" into a
+    K-Satisfiability problem in Conjunctive Normal form. There is one variable
+    per vertex, a clause forbidding each non-adjacent pair from both being
+    chosen, and a sequential counter which requires at least q to be chosen.
+    Only vertices with core number >= q - 1 are considered, and there must be
+    at least q of them.
+
+    SOURCE : Sinz, "Towards an Optimal CNF Encoding of Boolean Cardinality
+    Constraints" (2005)
+    '''
+    cores = _cores_to_array(G, cores)
+    indptr, indices = G.get_csr()
+    # The indices of the vertices which are considered. The variable for the
+    # ith of them is i + 1.
+    V = np.flatnonzero(cores >= q - 1)
+    m = len(V)
+    position = np.full(G.vertex_count, -1, dtype=np.int64)
+    position[V] = np.arange(m)
+    # s[(i, j)] is true if at least j of the first i vertices are chosen.
+    s = {(i, j):m + (i - 1) * q + j for i in range(1, m + 1) for j in range(1, q + 1)}
+
+    clauses = []
+    for i, u in enumerate(V.tolist()):
+        # Every later vertex which isn't a neighbor of u.
+        nbrs = position[indices[indptr[u]:indptr[u + 1]]]
+        for j in np.setdiff1d(np.arange(i + 1, m), nbrs, assume_unique=True).tolist():
+            clauses += [[-(i + 1), -(j + 1)]]
+
+    for i in range(1, m + 1):
+        for j in range(1, q + 1):
+            prev = [s[(i - 1, j)]] if i > 1 else []
+            clauses += [[-s[(i, j)], i] + prev]
+            # At least 0 of the first i - 1 vertices are always chosen, so
+            # this clause is only needed when j > 1.
+            if j > 1:
+                carry = [s[(i - 1, j - 1)]] if i > 1 else []
+                clauses += [[-s[(i, j)]] + carry + prev]
+    clauses += [[s[(m, q)]]]
+    return m + m * q, clauses
+
+def has_clique(G, q, cores=None):
+    '''
+    Checks whether G contains a clique of q vertices exactly, using the MiniSAT
+    algorithm.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to search for a clique.
+    q : int
+        The clique size to check for.
+    cores : dict
+        Core numbers of the vertices of G. These are computed if not given.
+    '''
+    if cores is None:
+        cores = core_numbers(G)
+    # Every vertex in a clique of size q has core number at least q - 1.
+    if sum(1 for c in cores.values() if c >= q - 1) < q:
+        return False
+    if q <= 1:
+        return True
+    nvars, clauses = clique_to_sat(G, q, cores=cores)
+    S = minisolvers.MinisatSolver()
+    for i in range(nvars):
+        S.new_var() # Add a new variable.
+    for clause in clauses:
+        S.add_clause(clause)
+    return S.solve()
+
+def chromatic_lower_bound(G, exact=False, tries=10):
+    '''
+    Returns a lower bound on the chromatic number of G, the size of the largest
+    clique found. The greedy heuristic is used first; if exact is True, the
+    bound is then raised one at a time with has_clique until the SAT solver
+    proves no larger clique exists.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to bound the chromatic number of.
+    exact : bool
+        Whether or not to use the SAT solver to find the maximum clique.
+    tries : int
+        The number of starting vertices for greedy_clique.
+    '''
+    cores = core_numbers(G)
+    bound = len(greedy_clique(G, tries=tries, cores=cores))
+    if exact:
+        # No clique can be larger than the degeneracy + 1.
+        limit = max(cores.values(), default=0) + 1
+        while bound < limit and has_clique(G, bound + 1, cores=cores):
+            bound += 1
+    return bound
@@ -0,0 +1,205 @@
+# An on-disk, content-addressed cache of generated graphs, along with the
+# results of the (slow) SAT colorability checks run on them. Graphs are keyed
+# by a hash of their edge arrays, so the same graph is only ever stored and
+# checked once, however it was produced.
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+from graph import Graph, canonicalize_edges
+from bounds import chromatic_lower_bound
+
+def graph_hash(G):
+    '''
+    Returns a canonical hash of G, which does not depend on the order of the
+    vertices or edges, the order of the endpoints in each edge, or duplicate
+    edges. Vertex labels can be of any dtype which NumPy can sort.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to hash.
+    '''
+    labels = G.labels
+    # Integer labels are widened, so that the hash doesn't depend on how wide
+    # an integer type they happen to be stored in.
+    if labels.dtype.kind in 'iu':
+        labels = labels.astype(np.int64)
+    order = np.argsort(labels, kind='stable')
+    # The position of each vertex in sorted label order, so that the edges
+    # are written in terms of the sorted labels.
+    rank = np.empty(G.vertex_count, dtype=np.int64)
+    rank[order] = np.arange(G.vertex_count)
+    E = canonicalize_edges(np.column_stack((rank[G.src], rank[G.dst])))
+    h = hashlib.sha256()
+    h.update(labels.dtype.str.encode())
+    h.update(b'|')
+    h.update(np.ascontiguousarray(labels[order]).tobytes())
+    h.update(b'|')
+    h.update(E.astype(np.int64).tobytes())
+    return h.hexdigest()
+
+def seed_key(seed):
+    '''
+    Returns a string identifying a seed, or None if the seed doesn't identify
+    a reproducible random stream (e.g. it is None, or a Generator which may
+    already have been used).
+    '''
+    if isinstance(seed, (int, np.integer)):
+        return str(int(seed))
+    if isinstance(seed, np.random.SeedSequence) and seed.entropy is not None:
+        return f'{seed.entropy}/' + '.'.join(str(i) for i in seed.spawn_key)
+    return None
+
+class InstanceCache():
+    def __init__(self, path='./.instance_cache', max_bytes=2**30):
+        '''
+        Params
+        ------
+        path : str
+            The directory to store the cache in. It is created if it doesn't
+            exist.
+        max_bytes : int
+            The maximum total size of the stored graph files. When this is
+            exceeded, the least recently used graphs are deleted.
+        '''
+        self.path = path
+        self.max_bytes = max_bytes
+        os.makedirs(path, exist_ok=True)
+        # Whether the index has changes which haven't been written out yet.
+        self.dirty = False
+        self.index_path = os.path.join(path, 'index.json')
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        else:
+            self.index = {'graphs':{}, 'instances':{}, 'colorable':{}, 'chromatic':{}}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __save_index(self):
+        tmp = self.index_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp, self.index_path)
+        self.dirty = False
+
+    def flush(self):
+        '''
+        Writes out any changes to the index which are still only held in
+        memory, i.e. the last used times of graphs loaded by get_graph.
+        '''
+        if self.dirty:
+            self.__save_index()
+
+    def close(self):
+        '''
+        Flushes the index. The cache should be closed (or used as a context
+        manager) once it is no longer needed.
+        '''
+        self.flush()
+
+    def __graph_path(self, h):
+        return os.path.join(self.path, f'{h}.npz')
+
+    def put_graph(self, G):
+        '''
+        Stores G in the cache, if it isn't there already, and returns its hash.
+        '''
+        h = graph_hash(G)
+        if h not in self.index['graphs']:
+            np.savez_compressed(self.__graph_path(h), labels=G.labels, src=G.src, dst=G.dst)
+            size = os.path.getsize(self.__graph_path(h))
+            self.index['graphs'][h] = {'size':size, 'used':time.time()}
+            self.__evict()
+            self.__save_index()
+        return h
+
+    def get_graph(self, h):
+        '''
+        Loads the graph with hash h, or returns None if it isn't in the cache.
+        '''
+        if h not in self.index['graphs']:
+            return None
+        with np.load(self.__graph_path(h)) as data:
+            G = Graph.from_arrays(data['src'], data['dst'], len(data['labels']), labels=data['labels'])
+        # The index isn't written out on every hit, as it would then be
+        # rewritten once per graph in a sweep over the cache. The new time is
+        # saved with the next change, or by flush.
+        self.index['graphs'][h]['used'] = time.time()
+        self.dirty = True
+        return G
+
+    def put_instance(self, key, G):
+        '''
+        Stores G under a key describing how it was generated, e.g. its
+        parameters and seed.
+        '''
+        self.index['instances'][key] = self.put_graph(G)
+        self.__save_index()
+
+    def get_instance(self, key):
+        '''
+        Loads the graph stored under key, or returns None if there isn't one.
+        '''
+        h = self.index['instances'].get(key)
+        return None if h is None else self.get_graph(h)
+
+    def __evict(self):
+        '''
+        Deletes the least recently used graphs until the total size of the
+        stored graphs is under self.max_bytes. Their SAT results are kept, as
+        they take up very little space.
+        '''
+        graphs = self.index['graphs']
+        total = sum(entry['size'] for entry in graphs.values())
+        for h in sorted(graphs, key=lambda h : graphs[h]['used']):
+            if total <= self.max_bytes:
+                break
+            total -= graphs.pop(h)['size']
+            os.remove(self.__graph_path(h))
+            self.index['instances'] = {key:g for key, g in self.index['instances'].items() if g != h}
+
+    def is_colorable(self, G, k):
+        '''
+        Checks to see if G is colorable with k colors, using the MiniSAT
+        algorithm only if the answer can't be worked out from earlier results.
+        A graph which is k-colorable is also colorable with more colors, and
+        one which is not k-colorable is not colorable with fewer.
+        '''
+        h = graph_hash(G)
+        known = self.index['colorable'].setdefault(h, {})
+        chromatic = self.index['chromatic'].get(h)
+        if chromatic is not None:
+            return k >= chromatic
+        if str(k) in known:
+            return known[str(k)]
+        for j, colorable in known.items():
+            if colorable and int(j) <= k:
+                return True
+            if not colorable and int(j) >= k:
+                return False
+
+        known[str(k)] = bool(G.is_colorable(k))
+        self.__save_index()
+        return known[str(k)]
+
+    def chromatic_number(self, G):
+        '''
+        Returns the chromatic number of G, by checking colorability upwards
+        from a clique lower bound. The result is memoized.
+        '''
+        h = graph_hash(G)
+        if h not in self.index['chromatic']:
+            k = max(1, chromatic_lower_bound(G))
+            while not self.is_colorable(G, k):
+                k += 1
+            self.index['chromatic'][h] = k
+            self.__save_index()
+        return self.index['chromatic'][h]
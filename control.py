@@ -1,101 +1,66 @@
 # The goal is to determine which features of the Tabu-Col algorithm are the
 # most important for performance. 
-import random
 import numpy as np
-import copy
 
-from graph import Graph, flatten
-
-def state_to_coloring(s):
-    '''
-    This function converts a Tabu-Col "state", represented as a list of lists of
-    vertex labels, to a coloring dictionary.
-    '''
-    coloring = {}
-    for (i, group) in enumerate(s):
-        for v in group:
-            coloring[v] = i
-    return coloring
-
-def apply_move(s, move):
-    '''
-    Take a move, represented by a vertex-coloring group pair, and applies it
-    to a state. 
-    '''
-    s_prime = copy.deepcopy(s)
-    v, c = move
-    for group in s_prime:
-        if v in group:
-            group.remove(v)
-    s_prime[c].append(v)
-    return s_prime
+from rng import default_rng, RandomBuffer
+from evaluation import make_evaluator
+from tabucol import state_to_colors, colors_to_state
 
 class Control():
-    def __init__(self, G, k):
+    def __init__(self, G, k, seed=None):
         self.G = G
         self.k = k
+        # All randomness is drawn from self.rng, so runs can be reproduced.
+        self.rng = default_rng(seed)
+        self.buffer = RandomBuffer(self.rng)
+        self.evaluator = make_evaluator(G, k)
      
     def __init_s(self):
         '''
-        Creates an initial state.
+        Creates an initial state, as an array holding the color of each vertex.
         '''
-        s0 = [[] for i in range(self.k)]
-        for v in self.G.V: # Add each vertex to a random coloring group.
-            idx = random.randint(0, self.k - 1)
-            s0[idx] += [v]
-        return s0
+        # Add each vertex to a random coloring group.
+        return self.rng.integers(0, self.k, size=self.G.vertex_count)
      
     def f(self, s):
         '''
         The objective function f of the Tabu-Col algorithm. It is defined as the
-        number of edges for which both vertices are in the same coloring group. 
+        number of vertices which share a coloring group with a neighbor. 
         
         Params
         -----
         state : list
             A list of lists representing the state of the system. 
         '''
-        coloring = state_to_coloring(s)
-        return len(self.G.get_conflicting_vertices(coloring))
+        return self.evaluator.objective(state_to_colors(self.G, s))
     
-    def __get_possible_moves(self, s):
+    def __get_possible_moves(self):
         '''
-        Generate a list of all moves from the current state, i.e. all moves
-        which bring a conflicting vertex out of its current coloring group. 
+        Generate arrays of all moves (v, c) from the current state, i.e. all
+        moves which bring a conflicting vertex out of its current coloring
+        group. 
         '''
         # First, get a list of all conflicting vertices.
-        coloring = state_to_coloring(s)
-        conflicting = self.G.get_conflicting_vertices(coloring)
-        
-        possible_moves = []
-        for v in conflicting:
-            possible_colors = np.delete(np.arange(self.k), coloring[v])
-            possible_moves += [(v, c) for c in possible_colors]
-        return possible_moves
+        conflicting = self.evaluator.conflicting()
+        vs = np.repeat(conflicting, self.k - 1)
+        # Every color except the vertex's current one. 
+        offsets = np.tile(np.arange(1, self.k), len(conflicting))
+        cs = (self.evaluator.colors[vs] + offsets) % self.k
+        return vs, cs
 
-    def __get_moves(self, s):
+    def __get_moves(self):
         '''
-        Gets a list of valid moves, given the features which are turned on. 
- 
-        Params
-        ------
-        s : list
-            The current state, represented as a list of lists. 
-        A_on : bool
-            Boolean indicating whether or not to make use of the aspiration
-            function. 
-        T_on : bool
-            Boolean indicating whether or not to make use of the Tabu list. 
+        Gets a random sample of up to self.rep moves from the current state,
+        each paired with the change in f it would cause. 
         '''
-        # Get the key for the current state.
-        z = self.f(s)
- 
-        possible_moves = self.__get_possible_moves(s)
-        # Sometimes, possible_moves is smaller than rep. This accounts for that
-        # case. 
-        return random.sample(possible_moves, min(len(possible_moves), self.rep))
+        vs, cs = self.__get_possible_moves()
+        # Sometimes, there are fewer possible moves than rep. This accounts for
+        # that case. 
+        idxs = self.buffer.sample(len(vs), self.rep)
+        moves = [(int(vs[i]), int(cs[i])) for i in idxs]
+        return [(move, self.evaluator.delta(*move)) for move in moves]
    
-    def run(self, maxiters=1000, rep=10):
+    def run(self, maxiters=1000, rep=10, recorder=None):
         '''
         Run the Control algorithm on self.G for self.k colors. Returns -1 if the
         algorithm gets stuck (no new moves can be generated), -2 if the maximum
@@ -107,33 +72,35 @@ class Control():
         maxiters : bool
             The number of iterations the algorithm will run through before
             exiting. 
-        T_size : int
-            The size of the Tabu list. If T_size > the number of possible moves,
-            an error will be thrown. 
         rep : int
             The number of neighbors to consider at each iteration. 
+        recorder : recorder.TraceRecorder
+            If given, the chosen move, objective value and number of candidates
+            are recorded at every iteration. 
         '''
         # Initialize all local variables and relevant attributes. 
         self.rep = rep
-        s = self.__init_s()
+        self.evaluator.reset(self.__init_s())
 
         iters = 0
-        while self.f(s) > 0 and iters < maxiters:
+        while self.evaluator.f > 0 and iters < maxiters:
             print(f'{iters} Control iterations completed.', end='\r')
             # Get a list of self.rep possible moves. 
-            moves = self.__get_moves(s)
+            moves = self.__get_moves()
 
-            g = lambda move : self.f(apply_move(s, move)) 
-            move = min(moves, key=g)
-            s = apply_move(s, move)
+            move, delta = min(moves, key=lambda m : m[1])
+            self.evaluator.move(*move)
+            if recorder is not None:
+                recorder.record(iters, move[0], move[1], self.evaluator.f, len(moves))
             iters += 1
         
+        # Store the final state, so the coloring can be recovered by the caller. 
+        colors = self.evaluator.colors
+        self.s = colors_to_state(self.G, colors, self.k)
+        self.coloring = dict(zip(self.G.V, colors.tolist()))
         if iters >= maxiters:
             print(f'FAILURE: Control was unable to find a solution within {maxiters} iterations.')
             return -2
         else:
             print(f'SUCCESS: Control found a solution in {iters} iterations.')
             return iters
-             
-
-
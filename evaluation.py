@@ -0,0 +1,184 @@
+# Backends for evaluating colorings incrementally. Each one keeps a conflict
+# table gamma, where gamma[v, c] is the number of neighbors of v with color c,
+# so that the change in the objective caused by a move can be found by only
+# looking at the neighbors of the vertex being moved.
+import numpy as np
+
+# Graphs with at least this edge density use the bitset backend.
+DENSE_THRESHOLD = 0.1
+
+if hasattr(np, 'bitwise_count'):
+    popcount = np.bitwise_count
+else:
+    _table = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    def popcount(x):
+        '''
+        Counts the set bits in each uint64 word of x.
+        '''
+        x = np.ascontiguousarray(x, dtype=np.uint64)
+        return _table[x.view(np.uint8)].reshape(x.shape + (8,)).sum(axis=-1)
+
+class SparseEvaluator():
+    '''
+    Evaluates colorings using the CSR adjacency arrays of the graph. Building
+    the conflict table takes O(|V| k + |E|).
+    '''
+    def __init__(self, G, k):
+        self.k = k
+        self.n = G.vertex_count
+        self.indptr, self.indices = G.get_csr()
+        self.degree = np.diff(self.indptr)
+
+    def neighbors(self, v):
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def gamma(self, colors):
+        '''
+        Computes the full conflict table for the coloring given by the array
+        colors, which holds the color of each vertex.
+        '''
+        rows = np.repeat(np.arange(self.n), self.degree)
+        counts = np.bincount(rows * self.k + colors[self.indices], minlength=self.n * self.k)
+        return counts.reshape(self.n, self.k)
+
+    def objective(self, colors, gamma=None):
+        '''
+        The number of vertices which share a color with at least one neighbor.
+        '''
+        if gamma is None:
+            gamma = self.gamma(colors)
+        return int(np.count_nonzero(gamma[np.arange(self.n), colors]))
+
+    def reset(self, colors):
+        '''
+        Sets the coloring being tracked, and builds its conflict table. The
+        colors array is updated in place by move.
+        '''
+        self.colors = colors
+        self.table = self.gamma(colors)
+        # The conflicting vertices are kept in the first self.count entries of
+        # self.pool, and self.where[v] is the position of v in self.pool (or -1
+        # if v isn't in conflict), so that vertices can be added and removed
+        # in O(1) as moves are made.
+        conflicting = np.flatnonzero(self.table[np.arange(self.n), colors])
+        self.count = len(conflicting)
+        self.pool = np.empty(self.n, dtype=np.int64)
+        self.pool[:self.count] = conflicting
+        self.where = np.full(self.n, -1, dtype=np.int64)
+        self.where[conflicting] = np.arange(self.count)
+        self.f = self.count
+
+    def conflicting(self):
+        '''
+        Returns the vertices which are in conflict in the tracked coloring, in
+        no particular order. This takes O(f), rather than a scan of all the
+        vertices.
+        '''
+        return self.pool[:self.count].copy()
+
+    def delta(self, v, c):
+        '''
+        Returns the change in the objective if vertex v is given color c. Only
+        v and its neighbors with its old or new color can change status.
+        '''
+        a = self.colors[v]
+        if a == c:
+            return 0
+        nbrs = self.neighbors(v)
+        nbr_colors = self.colors[nbrs]
+        table = self.table
+        # Neighbors in v's old group lose their conflict with v, and neighbors
+        # in its new group gain one.
+        lost = np.count_nonzero(table[nbrs[nbr_colors == a], a] == 1)
+        gained = np.count_nonzero(table[nbrs[nbr_colors == c], c] == 0)
+        return int(table[v, c] > 0) - int(table[v, a] > 0) - lost + gained
+
+    def move(self, v, c):
+        '''
+        Gives vertex v color c, and updates the conflict table, the set of
+        conflicting vertices and the objective.
+        '''
+        a = self.colors[v]
+        nbrs = self.neighbors(v)
+        self.table[nbrs, a] -= 1
+        self.table[nbrs, c] += 1
+        self.colors[v] = c
+        # Only v and its neighbors in its old or new group can change status.
+        nbr_colors = self.colors[nbrs]
+        self.__update(v)
+        for u in nbrs[(nbr_colors == a) | (nbr_colors == c)].tolist():
+            self.__update(u)
+        self.f = self.count
+
+    def __update(self, u):
+        '''
+        Adds u to or removes it from the pool of conflicting vertices, if its
+        status has changed.
+        '''
+        conflicted = self.table[u, self.colors[u]] > 0
+        i = self.where[u]
+        if conflicted and i < 0:
+            self.pool[self.count] = u
+            self.where[u] = self.count
+            self.count += 1
+        elif not conflicted and i >= 0:
+            # Fill the gap with the last vertex in the pool.
+            self.count -= 1
+            last = self.pool[self.count]
+            self.pool[i] = last
+            self.where[last] = i
+            self.where[u] = -1
+
+class DenseEvaluator(SparseEvaluator):
+    '''
+    Evaluates colorings using bit-packed adjacency rows, along with a bitmask
+    for each color holding the vertices with that color. Counting the
+    neighbors of v with color c is then popcount(adj[v] & mask[c]), which
+    handles 64 vertices per word operation. This speeds up building the full
+    conflict table; single moves are still applied through the CSR arrays,
+    since they only touch the neighbors of one vertex.
+    '''
+    def __init__(self, G, k):
+        super().__init__(G, k)
+        self.bits = G.get_adjacency_bits()
+        self.words = self.bits.shape[1]
+        self.shifts = np.left_shift(np.uint64(1), (np.arange(self.n) % 64).astype(np.uint64))
+
+    def masks(self, colors):
+        '''
+        Returns a (k, words) array, in which row c has a bit set for each vertex
+        with color c.
+        '''
+        masks = np.zeros((self.k, self.words), dtype=np.uint64)
+        np.bitwise_or.at(masks, (colors, np.arange(self.n) // 64), self.shifts)
+        return masks
+
+    def gamma(self, colors):
+        masks = self.masks(colors)
+        table = np.empty((self.n, self.k), dtype=np.int64)
+        for c in range(self.k):
+            table[:, c] = popcount(self.bits & masks[c]).sum(axis=1)
+        return table
+
+    def objective(self, colors, gamma=None):
+        if gamma is not None:
+            return super().objective(colors, gamma=gamma)
+        # Each vertex is checked against the mask for its own color.
+        same = popcount(self.bits & self.masks(colors)[colors]).sum(axis=1)
+        return int(np.count_nonzero(same))
+
+def make_evaluator(G, k):
+    '''
+    Picks the evaluation backend for G based on its edge density. The bitset
+    backend is used for dense graphs, and the CSR backend otherwise.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph whose colorings will be evaluated.
+    k : int
+        The number of colors.
+    '''
+    if G.density() >= DENSE_THRESHOLD:
+        return DenseEvaluator(G, k)
+    return SparseEvaluator(G, k)
@@ -22,34 +22,253 @@ def flatten(lol):
             flat += flatten(lst)
     return flat
 
+def canonicalize_edges(edgelist):
+    '''
+    Returns an (m, 2) integer array of the unique edges in edgelist, with each
+    edge written as (min(u, v), max(u, v)). Self-loops are dropped. This is
+    vectorized, so it runs in O(m log m) rather than the O(m^2) of a
+    membership test against the list for every edge. 
+
+    Params
+    ------
+    edgelist : list or np.ndarray
+        A list of 2-tuples (or an (m, 2) array) representing a collection of
+        edges. 
+    '''
+    E = np.asarray(edgelist, dtype=np.int64).reshape(-1, 2)
+    E = np.sort(E, axis=1)
+    E = E[E[:, 0] != E[:, 1]]
+    if len(E) == 0:
+        return E
+    return np.unique(E, axis=0)
+
 def remove_duplicate_edges(edgelist):
     '''
     A function which removes repeat edges from a list of edges. For example, if
-    both (u, v) and (v, u) are present in the list, one is removed. 
+    both (u, v) and (v, u) are present in the list, one is removed. Edges are
+    returned in canonical (min, max) order. 
 
     Params
     ------
     edgelist : list
         A list of 2-tuples representing a collection of edges. 
     '''
-    for (u, v) in edgelist:
-        if (v, u) in edgelist:
-            edgelist.remove((u, v))
-    return edgelist
+    return [tuple(e) for e in canonicalize_edges(edgelist).tolist()]
+
+def color_dtype(k):
+    '''
+    Returns the smallest unsigned integer dtype which can hold the colors
+    0, ..., k - 1.
+
+    Params
+    ------
+    k : int
+        The number of colors.
+    '''
+    if k <= np.iinfo(np.uint8).max + 1:
+        return np.uint8
+    if k <= np.iinfo(np.uint16).max + 1:
+        return np.uint16
+    return np.uint32
 
 class Graph:
 
     def __init__(self, E, V=None):
-        
+        '''
+        Stores the graph compactly, as a pair of int32 arrays src and dst
+        holding the endpoints of each edge as indices into the array of vertex
+        labels. The list-based V and E attributes are still available, but are
+        built from the arrays when they are accessed. 
+
+        Params
+        ------
+        E : list or np.ndarray
+            A list of 2-tuples (or an (m, 2) array) of vertex labels. 
+        V : list or np.ndarray
+            The vertex labels. If None, these are the vertices which appear in
+            E. 
+        '''
+        E = np.asarray(E).reshape(-1, 2)
         # If no vertex list is specified, extract the list of vertices from E. 
         if V is None:
-            self.V = list(set(flatten([list(t) for t in E])))
+            labels = np.unique(E)
         else:
-            self.V = V
-        
-        self.E = E
-        self.vertex_count = len(self.V)
-        self.edge_count = len(E)
+            labels = np.asarray(V)
+
+        self._set_arrays(labels, [], [])
+        idx = self.index_of(E)
+        if len(E) > 0 and (idx.min() < 0 or idx.max() >= len(labels) or not np.array_equal(labels[idx], E)):
+            raise ValueError('E contains vertices which are not in V.')
+        self._set_arrays(labels, idx[:, 0], idx[:, 1])
+
+    @classmethod
+    def from_arrays(cls, src, dst, n, labels=None):
+        '''
+        Builds a Graph directly from arrays of edge endpoints, without going
+        through lists of tuples. 
+
+        Params
+        ------
+        src : np.ndarray
+            The index of the first endpoint of each edge. 
+        dst : np.ndarray
+            The index of the second endpoint of each edge. 
+        n : int
+            The number of vertices. 
+        labels : np.ndarray
+            The label of each vertex. Defaults to 0, ..., n - 1. 
+        '''
+        G = cls.__new__(cls)
+        G._set_arrays(np.arange(n) if labels is None else np.asarray(labels), src, dst)
+        return G
+
+    def _set_arrays(self, labels, src, dst):
+        self.labels = labels
+        self.src = np.asarray(src, dtype=np.int32)
+        self.dst = np.asarray(dst, dtype=np.int32)
+        self.vertex_count = len(labels)
+        self.edge_count = len(self.src)
+        # If the vertices are labelled 0, ..., n - 1, labels and indices are
+        # the same thing. 
+        self._sorter = None if np.array_equal(labels, np.arange(len(labels))) else np.argsort(labels, kind='stable')
+        # These are all built the first time they are needed. 
+        self._V = None
+        self._csr = None
+        self._bits = None
+        self._adjacency = None
+
+    @property
+    def V(self):
+        '''
+        The vertex labels as a list. This is built on first access and cached. 
+        '''
+        if self._V is None:
+            self._V = self.labels.tolist()
+        return self._V
+
+    @V.setter
+    def V(self, V):
+        Graph.__init__(self, self.E, V=V)
+
+    @property
+    def E(self):
+        '''
+        The edges as a list of 2-tuples of vertex labels. This is rebuilt from
+        the endpoint arrays on every access, so code which runs over the edges
+        repeatedly should use src and dst instead. 
+        '''
+        E = np.column_stack((self.labels[self.src], self.labels[self.dst]))
+        return [tuple(e) for e in E.tolist()]
+
+    @E.setter
+    def E(self, E):
+        Graph.__init__(self, E, V=self.labels)
+
+    def density(self):
+        '''
+        Returns the edge density of the graph, |E| / (|V| choose 2). 
+        '''
+        n = self.vertex_count
+        return 0 if n < 2 else self.edge_count / (n * (n - 1) / 2)
+
+    def index_of(self, vertices):
+        '''
+        Converts vertex labels to indices into the endpoint arrays. 
+
+        Params
+        ------
+        vertices : int or np.ndarray
+            A vertex label, or an array of them. 
+        '''
+        if self._sorter is None:
+            return vertices
+        pos = np.searchsorted(self.labels, vertices, sorter=self._sorter)
+        return self._sorter[np.clip(pos, 0, self.vertex_count - 1)]
+
+    def get_csr(self):
+        '''
+        Returns the adjacency structure in compressed sparse row form, as a
+        pair of arrays (indptr, indices). The neighbors of the vertex with
+        index i are indices[indptr[i]:indptr[i + 1]], in sorted order. Self
+        loops and duplicate edges are dropped. 
+        '''
+        if self._csr is None:
+            E = canonicalize_edges(np.column_stack((self.src, self.dst)))
+            # Offsets only need to be 64-bit for graphs with over 2^30 edges.
+            offset_dtype = np.int32 if 2 * len(E) < np.iinfo(np.int32).max else np.int64
+            heads = np.concatenate((E[:, 0], E[:, 1]))
+            tails = np.concatenate((E[:, 1], E[:, 0]))
+            order = np.lexsort((tails, heads))
+            indices = tails[order].astype(np.int32)
+            indptr = np.zeros(self.vertex_count + 1, dtype=offset_dtype)
+            np.cumsum(np.bincount(heads, minlength=self.vertex_count), out=indptr[1:])
+            self._csr = (indptr, indices)
+        return self._csr
+
+    def get_adjacency_bits(self):
+        '''
+        Returns the adjacency matrix packed into bits, as an (n, ceil(n / 64))
+        array of uint64 words. Bit j % 64 of word j // 64 in row i is set if
+        vertices i and j share an edge. This takes n^2 / 8 bytes, so it is only
+        worthwhile for dense graphs. 
+        '''
+        if self._bits is None:
+            n = self.vertex_count
+            indptr, indices = self.get_csr()
+            rows = np.repeat(np.arange(n), np.diff(indptr))
+            bits = np.zeros((n, (n + 63) // 64), dtype=np.uint64)
+            shifts = np.left_shift(np.uint64(1), (indices % 64).astype(np.uint64))
+            np.bitwise_or.at(bits, (rows, indices // 64), shifts)
+            self._bits = bits
+        return self._bits
+
+    def has_edge(self, u, v):
+        '''
+        Returns whether or not vertices u and v share an edge. On dense graphs
+        this is an O(1) lookup in the packed adjacency rows; otherwise it is a
+        binary search in the sorted CSR row of u. 
+        '''
+        i, j = self.index_of(u), self.index_of(v)
+        # Bit rows take less memory than the CSR arrays once p > 1/32. 
+        if self._bits is not None or self.density() > 1 / 32:
+            word = self.get_adjacency_bits()[i, j // 64]
+            return bool((int(word) >> (j % 64)) & 1)
+        indptr, indices = self.get_csr()
+        row = indices[indptr[i]:indptr[i + 1]]
+        pos = np.searchsorted(row, j)
+        return bool(pos < len(row) and row[pos] == j)
+
+    def coloring_to_array(self, coloring, k=None):
+        '''
+        Converts a coloring dictionary to an array of colors, ordered like the
+        vertex labels. If k is given, the smallest dtype which can hold k
+        colors is used. 
+
+        Params
+        ------
+        coloring : dict
+            A dictionary mapping each vertex to a color. 
+        k : int
+            The number of colors. 
+        '''
+        dtype = np.int64 if k is None else color_dtype(k)
+        return np.fromiter((coloring[v] for v in self.V), dtype=dtype, count=self.vertex_count)
+
+    def memory_report(self):
+        '''
+        Returns a dictionary mapping each of the structures stored on the Graph
+        to the number of bytes it uses, along with the total. Structures which
+        have not been built yet are reported as 0 bytes. 
+        '''
+        report = {'labels':self.labels.nbytes, 'src':self.src.nbytes, 'dst':self.dst.nbytes}
+        report['csr'] = 0 if self._csr is None else sum(a.nbytes for a in self._csr)
+        report['bits'] = 0 if self._bits is None else self._bits.nbytes
+        report['V'] = 0 if self._V is None else sys.getsizeof(self._V) + sum(sys.getsizeof(v) for v in self._V)
+        report['adjacency'] = 0
+        if self._adjacency is not None:
+            report['adjacency'] = sys.getsizeof(self._adjacency) + sum(sys.getsizeof(s) for s in self._adjacency.values())
+        report['total'] = sum(report.values())
+        return report
     
     def get_graph_stats(self):
         '''
@@ -61,27 +280,48 @@ class Graph:
 
 
 
+    def get_adjacency(self):
+        '''
+        Returns a dictionary mapping each vertex to the set of vertices it
+        shares an edge with. The index is built once from the CSR arrays, and
+        cached on the Graph. It takes far more memory than the arrays it is
+        built from, so the solvers and bounds use get_csr instead. 
+        '''
+        if self._adjacency is None:
+            indptr, indices = self.get_csr()
+            V, neighbors = self.V, self.labels[indices].tolist()
+            self._adjacency = {v:set(neighbors[indptr[i]:indptr[i + 1]]) for i, v in enumerate(V)}
+        return self._adjacency
+
     def get_neighbors(self, v):
         '''
         Returns an array of vertices connected to v by an edge. 
         '''
-        neighbors = []
-        for e in self.E:
-            if v in e:
-                neighbors.append(e[0])
-                neighbors.append(e[1])
-        neighbors = list(set(neighbors))
-        # Need this accomodation in case a vertex has no neighbors. 
-        if len(neighbors) > 0:
-            neighbors.remove(v)
-        return neighbors
+        indptr, indices = self.get_csr()
+        i = self.index_of(v)
+        return self.labels[indices[indptr[i]:indptr[i + 1]]].tolist()
 
    
+    def __conflict_mask(self, coloring):
+        '''
+        Returns a Boolean array which is True for each edge whose two vertices
+        have the same color in the coloring dictionary. 
+        '''
+        # Make sure there is a color assigned to each vertex. Every vertex is
+        # looked up below, so if the coloring has no more entries than there
+        # are vertices, it has exactly the vertices of G. 
+        assert len(coloring) == self.vertex_count
+        try:
+            colors = self.coloring_to_array(coloring)
+        except KeyError as e:
+            raise AssertionError(f'No color is assigned to vertex {e}.')
+        return colors[self.src] == colors[self.dst]
+
     def get_conflicting_edges(self, coloring):
         '''
-        Returns an array of the edges whose two vertices are colored the same way,
-        given the input coloring. The coloring is a dictionary, which maps each
-        vertex to a color. 
+        Returns an (m, 2) array of the edges whose two vertices are colored the
+        same way, given the input coloring. The coloring is a dictionary, which
+        maps each vertex to a color. 
         
         Params
         ------
@@ -89,16 +329,8 @@ class Graph:
             A dictionary mapping each vertex (a positive integer) to a color
             (another positive integer). 
         '''
-        # Make sure there is a color assigned to each vertex.
-        assert set(self.V) == set(coloring.keys())
-
-        conflicts = np.array([])
-        for e in self.E:
-            u, v = e[0], e[1]
-            # If this is true, then there is a conflict. 
-            if coloring[u] == coloring[v]:
-                conflicts = np.append(conflicts, e)
-        return conflicts
+        mask = self.__conflict_mask(coloring)
+        return np.column_stack((self.labels[self.src[mask]], self.labels[self.dst[mask]]))
 
     def get_conflicting_vertices(self, coloring):
         '''
@@ -117,7 +349,8 @@ class Graph:
         Takes a dictionary as input, which maps each vertex in the graph to a
         color. Each color and vertex is assumed to be represented by an integer
         label. It returns a Boolean value, indicating whether or not the
-        coloring is valid.
+        coloring is valid. To check many colorings at once, use
+        validate.check_colorings. 
 
         Params
         ------
@@ -126,10 +359,7 @@ class Graph:
             (another positive integer). 
         '''
         # If the number of conflicting edges is zero, the coloring is valid.
-        if len(self.get_conflicting_edges(coloring)) == 0:
-            return True
-        else:
-            return False
+        return not self.__conflict_mask(coloring).any()
 
     def coloring_to_sat(self, k):
         '''
@@ -0,0 +1,207 @@
+# The hybrid evolutionary algorithm of Galinier and Hao, which uses TabuCol as
+# its local search step, and combines colorings using the greedy partition
+# crossover (GPX).
+#
+# SOURCE : Galinier and Hao, "Hybrid Evolutionary Algorithms for Graph
+# Coloring" (1999)
+import numpy as np
+import scipy.optimize
+from multiprocessing import Pool
+
+from tabucol import TabuCol, state_to_coloring
+from bounds import chromatic_lower_bound
+from rng import default_rng, spawn
+from sharedgraph import SharedGraph, resolve
+
+def gpx(s1, s2, k, rng):
+    '''
+    Combines two states using the greedy partition crossover. The child takes
+    the largest coloring group from each parent in turn, and the vertices in
+    that group are removed from both parents. Vertices which are left over
+    once all k groups are filled are added to random groups.
+
+    Params
+    ------
+    s1 : list
+        A list of lists representing the first parent state.
+    s2 : list
+        A list of lists representing the second parent state.
+    k : int
+        The number of coloring groups.
+    rng : numpy.random.Generator
+        The random number generator used to place left over vertices.
+    '''
+    parents = [[set(group) for group in s1], [set(group) for group in s2]]
+    child = []
+    for i in range(k):
+        group = max(parents[i % 2], key=len)
+        child.append(list(group))
+        # Remove the vertices in the chosen group from both parents.
+        taken = set(group)
+        for parent in parents:
+            for other in parent:
+                other -= taken
+
+    remaining = sorted(set().union(*parents[0]))
+    for v, idx in zip(remaining, rng.integers(0, k, size=len(remaining))):
+        child[idx].append(v)
+    return child
+
+def distance(s1, s2):
+    '''
+    The partition distance between two states, i.e. the smallest number of
+    vertices which need to be moved to turn one coloring into the other, once
+    the coloring groups have been matched up.
+
+    Params
+    ------
+    s1 : list
+        A list of lists representing a state.
+    s2 : list
+        A list of lists representing a state.
+    '''
+    sets = [set(group) for group in s2]
+    overlap = np.array([[len(sets[j].intersection(group)) for j in range(len(s2))] for group in s1])
+    rows, cols = scipy.optimize.linear_sum_assignment(overlap, maximize=True)
+    n = sum(len(group) for group in s1)
+    return n - overlap[rows, cols].sum()
+
+def _improve(args):
+    '''
+    Runs TabuCol from the given state, and returns the state it ends in. This
+    is defined at module level so that it can be sent to worker processes.
+    '''
+    G, k, s, seed, kwargs = args
+    tc = TabuCol(resolve(G), k, seed=seed)
+    tc.run(s0=s, check_bound=False, **kwargs)
+    return tc.s
+
+class HEA():
+    def __init__(self, G, k, seed=None):
+        self.G = G
+        self.k = k
+        self.rng = default_rng(seed)
+        # Only used for evaluating the objective function.
+        self.tc = TabuCol(G, k)
+
+    def f(self, s):
+        '''
+        The objective function f, the same as the one used by TabuCol.
+        '''
+        return self.tc.f(s)
+
+    def __improve(self, states, kwargs):
+        '''
+        Applies the TabuCol local search to each of the states, in parallel if
+        a pool of worker processes is available.
+        '''
+        # Each TabuCol run gets its own independent random stream.
+        seeds = spawn(self.rng, len(states))
+        if self.pool is None:
+            jobs = [(self.G, self.k, s, seed, kwargs) for s, seed in zip(states, seeds)]
+            return list(map(_improve, jobs))
+        # Workers attach to the shared copy of the graph, rather than each job
+        # pickling the whole graph.
+        jobs = [(self.shared.handle, self.k, s, seed, kwargs) for s, seed in zip(states, seeds)]
+        return self.pool.map(_improve, jobs)
+
+    def __update_population(self, child):
+        '''
+        Adds a child to the population if doing so does not hurt its
+        diversity. If the child is within self.min_distance of a member, it
+        can only replace that member, and only if it is better. Otherwise, it
+        replaces the worst member of the population, if it is better.
+        '''
+        f_child = self.f(child)
+        distances = [distance(child, s) for s in self.population]
+        closest = int(np.argmin(distances))
+        if distances[closest] < self.min_distance:
+            if f_child < self.scores[closest]:
+                self.population[closest], self.scores[closest] = child, f_child
+            return
+
+        worst = int(np.argmax(self.scores))
+        if f_child <= self.scores[worst]:
+            self.population[worst], self.scores[worst] = child, f_child
+
+    def run(self,
+            generations=100,
+            pop_size=10,
+            maxiters=1000,
+            T_size=10,
+            rep=10,
+            min_distance=None,
+            processes=None):
+        '''
+        Run the hybrid evolutionary algorithm on self.G for self.k colors.
+        Returns -2 if the maximum number of generations is reached, -3 if
+        self.k is below a lower bound on the chromatic number of self.G, and
+        the number of generations if the algorithm is successful.
+
+        Params
+        ------
+        generations : int
+            The number of generations the algorithm will run through before
+            exiting.
+        pop_size : int
+            The number of states in the population.
+        maxiters : int
+            The number of TabuCol iterations used to improve each state.
+        T_size : int
+            The size of the Tabu list used by TabuCol.
+        rep : int
+            The number of neighbors TabuCol considers at each iteration.
+        min_distance : int
+            States closer together than this are considered duplicates, and
+            can't both be kept in the population. Defaults to 1% of the number
+            of vertices.
+        processes : int
+            The number of worker processes to run TabuCol in. If not None, this
+            many children are produced and improved in parallel at each
+            generation, and the workers share a single copy of self.G.
+        '''
+        if self.k < chromatic_lower_bound(self.G):
+            print(f'FAILURE: HEA cannot color G with {self.k} colors.')
+            return -3
+
+        kwargs = {'maxiters':maxiters, 'T_size':T_size, 'rep':rep}
+        self.min_distance = max(1, self.G.vertex_count // 100) if min_distance is None else min_distance
+        # The graph is published before the pool is created, so the workers
+        # can attach to it as soon as they start.
+        self.shared = None if processes is None else SharedGraph(self.G)
+        self.pool = None if processes is None else Pool(processes)
+        batch = 1 if processes is None else processes
+
+        try:
+            # Initialize the population with random states, improved by TabuCol.
+            self.population = self.__improve([None] * pop_size, kwargs)
+            self.scores = [self.f(s) for s in self.population]
+
+            generation = 0
+            while min(self.scores) > 0 and generation < generations:
+                print(f'{generation} HEA generations completed (best f={min(self.scores)}).', end='\r')
+                children = []
+                for i in range(batch):
+                    p1, p2 = self.rng.choice(pop_size, 2, replace=False)
+                    children.append(gpx(self.population[p1], self.population[p2], self.k, self.rng))
+                for child in self.__improve(children, kwargs):
+                    self.__update_population(child)
+                generation += 1
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+                self.pool = None
+            if self.shared is not None:
+                self.shared.close()
+                self.shared.unlink()
+                self.shared = None
+
+        best = int(np.argmin(self.scores))
+        self.s, self.coloring = self.population[best], state_to_coloring(self.population[best])
+        if min(self.scores) > 0:
+            print(f'FAILURE: HEA was unable to find a solution within {generations} generations.')
+            return -2
+        else:
+            print(f'SUCCESS: HEA found a solution in {generation} generations.')
+            return generation
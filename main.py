@@ -8,25 +8,41 @@ import seaborn as sns
 from testutils import *
 from tabucol import TabuCol
 from control import Control
+from partialcol import PartialCol
 from randomgraph import RandomGraph
 from graph import Graph
+from recorder import TraceRecorder, load_trace
 
 # print(reproduce_hdw_table2())
 
 df = pd.read_csv('./data.csv')
 df = df[df['iters'] < 0]
-fig, axes = plt.subplots(2)
+fig, axes = plt.subplots(df['algorithm'].nunique(), squeeze=False)
 for i, (algorithm, group) in enumerate(df.groupby('algorithm')):
     x, y = [], []
     for n, subgroup in group.groupby('n'):
         x.append(int(n))
         y.append(len(subgroup['iters']))
-    axes[i].bar(x, y)
-    # axes[i].set_ylim([0, 700])
-    axes[i].set_title(str(algorithm))
+    axes[i, 0].bar(x, y)
+    # axes[i, 0].set_ylim([0, 700])
+    axes[i, 0].set_title(str(algorithm))
 plt.tight_layout()
 plt.show()
 
+# # Record the trajectory of a single TabuCol run, and plot the objective
+# # function over time, marking the iterations where the aspiration function
+# # let a tabu move through. 
+# n = 100
+# graph = generate_colorable_graph(3, n, (2.2 * n) / math.comb(n, 2), seed=0)
+# recorder = TraceRecorder('./tabucol.trace')
+# TabuCol(graph, 3, seed=0).run(rep=50, T_size=7, maxiters=10000, recorder=recorder)
+# recorder.close()
+# trace = load_trace('./tabucol.trace')
+# ax = trace.plot(x='iter', y='f')
+# aspirated = trace[trace['aspirated']]
+# ax.scatter(aspirated['iter'], aspirated['f'], color='red')
+# plt.savefig('./tabucol_trace.png')
+
 
 # k = 3
 # # See how well the TabuCol algorithm performs relative to the control according
@@ -47,10 +63,15 @@ plt.show()
 #         ctrl = Control(graph, k)
 #         ctrl_result = ctrl.run(maxiters=10000)
 # 
+#         pc = PartialCol(graph, k)
+#         pc_result = pc.run(rep=int(n * 0.5), T_size=7, maxiters=10000)
+# 
 #         df = df.append({'algorithm':'ctrl', 'k':k, 'n':n, 'p':p,
 #             'iters':ctrl_result}, ignore_index=True)
 #         df = df.append({'algorithm':'tabucol', 'k':k, 'n':n, 'p':p,
 #             'iters':tc_result}, ignore_index=True)
+#         df = df.append({'algorithm':'partialcol', 'k':k, 'n':n, 'p':p,
+#             'iters':pc_result}, ignore_index=True)
 # df.to_csv('./data.csv')
 
 # for k, ratio in zip([3, 4], [2.3, 3.6]):
@@ -0,0 +1,166 @@
+# Move operators for TabuCol. Each operator generates candidate moves from the
+# current coloring tracked by an evaluator (see evaluation.py), and knows how
+# to compute the change in f a move causes and how to apply it. A move is a
+# tuple of (vertex, color) pairs, which are applied in order; the first pair
+# is the one checked against (and added to) the Tabu list. Candidates are
+# generated lazily, and the caller passes the number it expects to need, so
+# operators can avoid shuffling every possible move.
+import numpy as np
+
+class SingleMove():
+    '''
+    Gives a single conflicting vertex a new color. This is the neighborhood
+    used by Hertz and de Werra.
+    '''
+    # Whether every move the operator generates has the same delta.
+    constant_delta = False
+
+    def candidates(self, evaluator, buffer, size):
+        '''
+        Yields every move which brings a conflicting vertex out of its current
+        coloring group, in a random order. Only a sample of size moves is drawn
+        at first, as that is usually all the caller needs; the rest are only
+        shuffled if too many of those turn out to be tabu.
+        '''
+        conflicting = evaluator.conflicting()
+        k = evaluator.k
+        vs = np.repeat(conflicting, k - 1)
+        # Every color except the vertex's current one.
+        offsets = np.tile(np.arange(1, k), len(conflicting))
+        cs = (evaluator.colors[vs] + offsets) % k
+        sample = buffer.sample(len(vs), size)
+        for i in sample:
+            yield ((int(vs[i]), int(cs[i])),)
+        if len(sample) < len(vs):
+            rest = np.ones(len(vs), dtype=bool)
+            rest[sample] = False
+            rest = np.flatnonzero(rest)
+            for i in rest[buffer.permutation(len(rest))]:
+                yield ((int(vs[i]), int(cs[i])),)
+
+    def delta(self, evaluator, move):
+        '''
+        Returns the change in f the move would cause.
+        '''
+        (v, c), = move
+        return evaluator.delta(v, c)
+
+    def apply(self, evaluator, move):
+        '''
+        Applies the move to the coloring tracked by the evaluator.
+        '''
+        for v, c in move:
+            evaluator.move(v, c)
+
+class SwapMove(SingleMove):
+    '''
+    Exchanges the colors of a conflicting vertex and a random vertex with a
+    different color, so that the sizes of the coloring groups don't change.
+    '''
+    def __init__(self, tries=3):
+        # The number of random partners drawn for each conflicting vertex.
+        self.tries = tries
+
+    def candidates(self, evaluator, buffer, size):
+        colors = evaluator.colors
+        conflicting = evaluator.conflicting()
+        for i in buffer.permutation(len(conflicting)):
+            v = int(conflicting[i])
+            for j in range(self.tries):
+                u = buffer.randint(evaluator.n)
+                if colors[u] != colors[v]:
+                    yield ((v, int(colors[u])), (u, int(colors[v])))
+                    break
+
+    def delta(self, evaluator, move):
+        '''
+        The two recolorings interact when u and v are neighbors (or share
+        neighbors), so the second delta is taken after applying the first, and
+        the first is then undone. This costs O(deg(u) + deg(v)).
+        '''
+        (v, b), (u, a) = move
+        d = evaluator.delta(v, b)
+        evaluator.move(v, b)
+        d += evaluator.delta(u, a)
+        evaluator.move(v, a)
+        return d
+
+class KempeMove(SingleMove):
+    '''
+    Swaps the two colors a and b on a Kempe chain, i.e. a connected component
+    of the subgraph induced by the vertices colored a or b, starting from a
+    conflicting vertex with color a.
+    '''
+    # Every Kempe move has the same delta (see delta), so the caller can stop
+    # at the first one which isn't tabu.
+    constant_delta = True
+
+    def __init__(self, max_chain=50, tries=3):
+        # Chains with more than max_chain vertices are skipped.
+        self.max_chain = max_chain
+        # The number of chains built each time candidates are asked for. In
+        # dense or badly colored graphs most chains are too long, and building
+        # one for every conflicting vertex would cost far more than the
+        # iteration itself.
+        self.tries = tries
+        # Marks the vertices in the chain being built. It is allocated once,
+        # and cleared after each chain.
+        self.visited = None
+
+    def chain(self, evaluator, v, b):
+        '''
+        Returns the Kempe chain containing v for the colors of v and b, as a
+        list of vertices, by a breadth-first search over the CSR adjacency
+        arrays restricted to those two colors. Returns None if the chain is
+        longer than self.max_chain.
+        '''
+        if self.visited is None or len(self.visited) != evaluator.n:
+            self.visited = np.zeros(evaluator.n, dtype=bool)
+        visited = self.visited
+        colors = evaluator.colors
+        a = colors[v]
+        chain = [v]
+        visited[v] = True
+        try:
+            i = 0
+            while i < len(chain):
+                nbrs = evaluator.neighbors(chain[i])
+                i += 1
+                nbr_colors = colors[nbrs]
+                new = nbrs[((nbr_colors == a) | (nbr_colors == b)) & ~visited[nbrs]]
+                visited[new] = True
+                chain.extend(new.tolist())
+                if self.max_chain is not None and len(chain) > self.max_chain:
+                    return None
+            return chain
+        finally:
+            visited[chain] = False
+
+    def candidates(self, evaluator, buffer, size):
+        '''
+        Yields Kempe moves from up to self.tries random conflicting vertices,
+        building each chain only when it is asked for.
+        '''
+        colors = evaluator.colors
+        k = evaluator.k
+        conflicting = evaluator.conflicting()
+        for i in buffer.sample(len(conflicting), self.tries):
+            v = int(conflicting[i])
+            a = int(colors[v])
+            b = (a + 1 + buffer.randint(k - 1)) % k
+            chain = self.chain(evaluator, v, b)
+            if chain is None:
+                continue
+            # v goes first, so it is the vertex checked against the Tabu list.
+            yield tuple([(v, b)] + [(u, a if colors[u] == b else b) for u in chain[1:]])
+
+    def delta(self, evaluator, move):
+        '''
+        Every neighbor of a chain vertex with color a or b is itself in the
+        chain, so a vertex shares a color with exactly the same neighbors
+        before and after the swap. Swapping a whole chain therefore never
+        changes f; these moves let the search cross plateaus and reach
+        colorings which single-vertex moves would need several steps (some of
+        them tabu) to get to.
+        '''
+        return 0
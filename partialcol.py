@@ -0,0 +1,174 @@
+# PartialCol only ever keeps legal partial colorings, and tries to reduce the
+# number of vertices which are left uncolored, rather than searching complete
+# colorings with conflicts like TabuCol does.
+#
+# SOURCE : Blöchliger and Zufferey, "A graph coloring heuristic using partial
+# solutions and a reactive tabu scheme" (2008)
+import numpy as np
+
+from bounds import chromatic_lower_bound
+from rng import default_rng, RandomBuffer
+
+class PartialCol():
+    def __init__(self, G, k, seed=None):
+        self.G = G
+        self.k = k
+        self.bound = None
+        # All randomness is drawn from self.rng, so runs can be reproduced.
+        self.rng = default_rng(seed)
+        self.buffer = RandomBuffer(self.rng)
+
+        # The neighbors of vertex i are indices[indptr[i]:indptr[i + 1]].
+        self.labels = G.V
+        self.indptr, self.indices = G.get_csr()
+
+    def __neighbors(self, v):
+        return self.indices[self.indptr[v]:self.indptr[v + 1]]
+
+    def __color(self, v, c):
+        '''
+        Assigns color c to the uncolored vertex v, updating the conflict table.
+        '''
+        self.colors[v] = c
+        self.gamma[self.__neighbors(v), c] += 1
+        self.pool.remove(v)
+
+    def __uncolor(self, v):
+        '''
+        Removes the color from vertex v, and adds it to the pool of uncolored
+        vertices.
+        '''
+        c = self.colors[v]
+        self.colors[v] = -1
+        self.gamma[self.__neighbors(v), c] -= 1
+        self.pool.add(v)
+
+    def __init_s(self):
+        '''
+        Creates an initial state, by greedily coloring the vertices in a random
+        order. Vertices which can't be colored without a conflict are left in
+        the pool.
+        '''
+        n = len(self.labels)
+        self.colors = np.full(n, -1, dtype=np.int64)
+        # gamma[v, c] is the number of neighbors of v which have color c.
+        self.gamma = np.zeros((n, self.k), dtype=np.int64)
+        self.pool = set(range(n))
+
+        for v in self.rng.permutation(n):
+            free = np.flatnonzero(self.gamma[v] == 0)
+            if len(free) > 0:
+                self.__color(v, free[0])
+
+    def f(self):
+        '''
+        The objective function f of the PartialCol algorithm, the number of
+        uncolored vertices.
+        '''
+        return len(self.pool)
+
+    def __get_move(self, iters, best):
+        '''
+        Picks the best move (v, c) which takes a vertex v out of the pool, and
+        gives it color c. Neighbors of v with color c are uncolored, so the
+        change in f is gamma[v, c] - 1. Tabu moves are allowed only if they
+        would improve on the best value of f found so far. Returns None if
+        every move is tabu.
+        '''
+        pool = np.fromiter(self.pool, dtype=np.int64, count=len(self.pool))
+        if len(pool) > self.rep:
+            pool = pool[self.buffer.permutation(len(pool))[:self.rep]]
+
+        delta = self.gamma[pool] - 1
+        tabu = self.T[pool] > iters
+        aspirated = self.f() + delta < best
+        delta = np.where(tabu & ~aspirated, np.iinfo(np.int64).max, delta)
+
+        lowest = delta.min()
+        if lowest == np.iinfo(np.int64).max:
+            return None
+        # Break ties at random.
+        ties = np.argwhere(delta == lowest)
+        i, c = ties[self.buffer.randint(len(ties))]
+        return pool[i], c
+
+    def run(self,
+            maxiters=1000,
+            T_size=10,
+            rep=10,
+            check_bound=True):
+        '''
+        Run the PartialCol algorithm on self.G for self.k colors. Returns -1 if
+        the algorithm gets stuck (no new moves can be generated), -2 if the
+        maximum number of iterations is reached, -3 if self.k is below a lower
+        bound on the chromatic number of self.G, and the number of iterations
+        if the algorithm is successful.
+
+        Params
+        ------
+        maxiters : bool
+            The number of iterations the algorithm will run through before
+            exiting.
+        T_size : int
+            The number of iterations for which a vertex can't be given back a
+            color it was removed from.
+        rep : int
+            The number of uncolored vertices whose moves are considered at each
+            iteration.
+        check_bound : bool
+            Whether or not to check self.k against a clique lower bound before
+            searching.
+        '''
+        if check_bound:
+            if self.bound is None:
+                self.bound = chromatic_lower_bound(self.G)
+            if self.k < self.bound:
+                print(f'FAILURE: G contains a clique of size {self.bound}, so it cannot be colored with {self.k} colors.')
+                self.coloring = None
+                return -3
+
+        # Initialize all local variables and relevant attributes.
+        self.rep = rep
+        self.__init_s()
+        # T[v, c] is the iteration until which giving v color c is tabu.
+        self.T = np.zeros((len(self.labels), self.k), dtype=np.int64)
+        best = self.f()
+
+        iters = 0
+        while self.f() > 0 and iters < maxiters:
+            print(f'{iters} PartialCol iterations completed.', end='\r')
+            move = self.__get_move(iters, best)
+            if move is None:
+                # If no moves could be generated, the algorithm is stuck.
+                print('FAILURE: PartialCol was unable to generate any new moves.')
+                self.coloring = self.__get_coloring()
+                return -1
+
+            v, c = move
+            for u in self.__neighbors(v):
+                if self.colors[u] == c:
+                    self.__uncolor(u)
+                    # Don't let u take back its old color for a while.
+                    self.T[u, c] = iters + T_size
+            self.__color(v, c)
+            best = min(best, self.f())
+
+            iters += 1
+
+        # Store the final state, so the coloring can be recovered by the caller.
+        self.coloring = self.__get_coloring()
+        if iters >= maxiters:
+            print(f'FAILURE: PartialCol was unable to find a solution within {maxiters} iterations.')
+            return -2
+        else:
+            print(f'SUCCESS: PartialCol found a solution in {iters} iterations.')
+            return iters
+
+    def __get_coloring(self):
+        '''
+        Converts the current state to a coloring dictionary. Vertices which are
+        still uncolored are given the color they have the fewest conflicts with,
+        so that the coloring is complete, like the ones TabuCol produces.
+        '''
+        colors = np.where(self.colors >= 0, self.colors, self.gamma.argmin(axis=1))
+        return {v:int(c) for v, c in zip(self.labels, colors)}
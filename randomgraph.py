@@ -1,11 +1,10 @@
-import random
-import scipy.stats
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
 import math 
 
 from graph import flatten, remove_duplicate_edges, Graph
+from rng import default_rng
 
 
 class RandomGraph(Graph):
@@ -14,7 +13,7 @@ class RandomGraph(Graph):
     the Graph object in Mathematica. Note that this graph is not necessarily  
     '''
     # NOTE: p is often a function of p, e.g. d/n for some value d. 
-    def __init__(self, n, p):
+    def __init__(self, n, p, seed=None):
         '''
         Generates a random graph with n vertices. The number of edges is
         determined by p, which is edge probability. 
@@ -27,21 +26,19 @@ class RandomGraph(Graph):
             Number of vertices in the random graph. 
         p : float
             Probability of an edge existing between any two vertices. 
+        seed : None, int, or numpy.random.Generator
+            Seed for the random number generator used to draw the edges. 
         '''
-        self.vertex_count = n
-        # Generate a list of vertices. 
-        self.V = list(range(n))
-
-        # Select m random edges.
-        possible_edges = flatten([(i, j) for i in self.V for j in self.V if i != j])
-        possible_edges = remove_duplicate_edges(possible_edges)
-       
-        E = []
-        for edge in possible_edges:
-            # Draws a number form a normal distribution centered at 0.  
-            rv = scipy.stats.uniform.rvs(size=1)[0]
-            if rv < p: # Add an edge with a certain probability p. 
-                E.append(edge)
-        self.E = E
-        self.edge_count = len(E)
+        rng = default_rng(seed)
 
+        # Select random edges one row of the upper triangle at a time, so that
+        # the full list of n^2 possible edges never has to be held in memory. 
+        # Each candidate edge (i, j) with i < j is added with probability p. 
+        src, dst = [], []
+        for i in range(n - 1):
+            js = np.flatnonzero(rng.random(n - 1 - i) < p) + i + 1
+            src.append(np.full(len(js), i, dtype=np.int32))
+            dst.append(js.astype(np.int32))
+        src = np.concatenate(src) if n > 1 else np.zeros(0, dtype=np.int32)
+        dst = np.concatenate(dst) if n > 1 else np.zeros(0, dtype=np.int32)
+        self._set_arrays(np.arange(n), src, dst)
@@ -0,0 +1,128 @@
+# Records the trajectory of a search, one record per iteration, so that runs
+# which fail can be looked at after the fact. Records are kept in a
+# preallocated NumPy buffer, which is flushed to a compact binary file when it
+# fills up (or, if there is no file, overwritten oldest-first like a ring).
+import numpy as np
+import pandas as pd
+
+# Marks the start of a trace file, followed by the raw records.
+MAGIC = b'TCTRACE1'
+
+# Each record is 19 bytes.
+TRACE_DTYPE = np.dtype([
+    ('iter', '<u4'),
+    ('vertex', '<i4'),
+    ('color', '<i2'),
+    ('f', '<i4'),
+    ('candidates', '<u4'),
+    ('flags', 'u1')])
+
+# Bits of the flags field.
+TABU = 1
+ASPIRATED = 2
+STUCK = 4
+
+class TraceRecorder():
+    def __init__(self, path=None, capacity=65536):
+        '''
+        Params
+        ------
+        path : str
+            The file to write the trace to. If None, only the last capacity
+            records are kept, in memory.
+        capacity : int
+            The number of records held in memory at once.
+        '''
+        self.path = path
+        self.buffer = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.capacity = capacity
+        self.pos = 0
+        # The total number of records seen, including flushed ones.
+        self.count = 0
+        self.file = None
+        if path is not None:
+            self.file = open(path, 'wb')
+            self.file.write(MAGIC)
+
+    def record(self, iters, v, c, f, candidates, flags=0):
+        '''
+        Records a single iteration of a search.
+
+        Params
+        ------
+        iters : int
+            The iteration number.
+        v : int
+            The index of the vertex which was moved, or -1 if there was no move.
+        c : int
+            The color the vertex was moved to.
+        f : int
+            The value of the objective function after the move.
+        candidates : int
+            The number of candidate moves the move was chosen from.
+        flags : int
+            Any of TABU, ASPIRATED and STUCK, combined with |.
+        '''
+        if self.pos == self.capacity:
+            self.flush()
+        self.buffer[self.pos] = (iters, v, c, f, candidates, flags)
+        self.pos += 1
+        self.count += 1
+
+    def flush(self):
+        '''
+        Writes the records held in memory to the trace file. Without a file,
+        the buffer is just reused from the start, overwriting the oldest
+        records.
+        '''
+        if self.file is not None:
+            self.buffer[:self.pos].tofile(self.file)
+        self.pos = 0
+
+    def close(self):
+        '''
+        Flushes any remaining records and closes the trace file.
+        '''
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+
+    def to_dataframe(self):
+        '''
+        Returns the records held in memory as a DataFrame, oldest first. For a
+        recorder with a file, use load_trace after calling close instead.
+        '''
+        if self.count > self.capacity and self.file is None:
+            # The buffer has wrapped around, so the oldest record is at pos.
+            records = np.concatenate((self.buffer[self.pos:], self.buffer[:self.pos]))
+        else:
+            records = self.buffer[:self.pos]
+        return records_to_dataframe(records)
+
+def records_to_dataframe(records):
+    '''
+    Converts an array of TRACE_DTYPE records to a DataFrame, with the flags
+    split out into Boolean columns.
+    '''
+    df = pd.DataFrame({name:records[name] for name in TRACE_DTYPE.names})
+    df['tabu'] = (df['flags'] & TABU) > 0
+    df['aspirated'] = (df['flags'] & ASPIRATED) > 0
+    df['stuck'] = (df['flags'] & STUCK) > 0
+    return df
+
+def load_trace(path):
+    '''
+    Loads a trace file written by a TraceRecorder into a DataFrame, with one
+    row per iteration.
+
+    Params
+    ------
+    path : str
+        The trace file to load.
+    '''
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a trace file.')
+        records = np.fromfile(f, dtype=TRACE_DTYPE)
+    return records_to_dataframe(records)
@@ -0,0 +1,204 @@
+# Preprocessing passes which shrink a coloring instance before it is handed
+# to TabuCol (or Control). Vertices of degree < k can always be colored last,
+# so they are peeled off, and what remains is split into connected components
+# which can be solved independently.
+import collections
+import numpy as np
+import scipy.sparse
+import scipy.sparse.csgraph
+from multiprocessing import Pool
+
+from graph import Graph, canonicalize_edges
+from tabucol import TabuCol
+from rng import spawn
+
+def kcore_reduce(G, k):
+    '''
+    Iteratively peels vertices with degree < k from G. Returns the list of
+    vertices left in the k-core, the canonical (m, 2) array of edges between
+    them, and the peeled vertices in the order they were removed. Each vertex
+    is adjacent to fewer than k vertices which are still present when it is
+    removed, so coloring the peeled vertices in reverse order always leaves a
+    free color.
+
+    Peeling uses a queue of vertices whose degree has dropped below k, and
+    only the neighbors of each removed vertex are updated, so it takes
+    O(|V| + |E|) however many rounds the peeling would take.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to reduce.
+    k : int
+        The number of available colors.
+    '''
+    labels = G.labels
+    n = len(labels)
+    indptr, indices = G.get_csr()
+    # degree[v] is the number of neighbors of v which haven't been removed.
+    degree = np.diff(indptr).astype(np.int64)
+
+    alive = np.ones(n, dtype=bool)
+    queued = degree < k
+    queue = collections.deque(np.flatnonzero(queued).tolist())
+    order = []
+    while len(queue) > 0:
+        v = queue.popleft()
+        alive[v] = False
+        order.append(v)
+        nbrs = indices[indptr[v]:indptr[v + 1]]
+        nbrs = nbrs[alive[nbrs]]
+        degree[nbrs] -= 1
+        low = nbrs[(degree[nbrs] < k) & ~queued[nbrs]]
+        queued[low] = True
+        queue.extend(low.tolist())
+
+    E = canonicalize_edges(np.column_stack((G.src, G.dst)))
+    E = E[alive[E[:, 0]] & alive[E[:, 1]]]
+    core = labels[alive].tolist()
+    return core, labels[E].reshape(-1, 2), labels[order].tolist()
+
+def split_components(V, E):
+    '''
+    Splits the graph given by a vertex list and an (m, 2) edge array into its
+    connected components. Returns a list of Graph objects, one per component.
+
+    Params
+    ------
+    V : list
+        The vertex labels of the graph.
+    E : np.ndarray
+        An (m, 2) array of edges, given as vertex labels.
+    '''
+    if len(V) == 0:
+        return []
+    G = Graph(E, V=V)
+    n = G.vertex_count
+    A = scipy.sparse.coo_matrix((np.ones(G.edge_count), (G.src, G.dst)), shape=(n, n))
+    count, membership = scipy.sparse.csgraph.connected_components(A, directed=False)
+
+    # Sort the vertices and edges by component once, so that each component
+    # is a contiguous slice of both, rather than scanning every edge for each
+    # component.
+    vertex_order = np.argsort(membership, kind='stable')
+    vertex_bounds = np.searchsorted(membership[vertex_order], np.arange(count + 1))
+    edge_membership = membership[G.src]
+    edge_order = np.argsort(edge_membership, kind='stable')
+    edge_bounds = np.searchsorted(edge_membership[edge_order], np.arange(count + 1))
+    # The index of each vertex within its own component.
+    local = np.empty(n, dtype=np.int64)
+    local[vertex_order] = np.arange(n) - vertex_bounds[membership[vertex_order]]
+    src, dst = local[G.src[edge_order]], local[G.dst[edge_order]]
+    labels = G.labels[vertex_order]
+
+    components = []
+    for c in range(count):
+        lo, hi = edge_bounds[c], edge_bounds[c + 1]
+        V_c = labels[vertex_bounds[c]:vertex_bounds[c + 1]]
+        components.append(Graph.from_arrays(src[lo:hi], dst[lo:hi], len(V_c), labels=V_c))
+    return components
+
+def reduce_graph(G, k):
+    '''
+    Runs the full reduction pipeline on G: duplicate edges are removed, the
+    graph is reduced to its k-core, and the core is split into connected
+    components. Returns the list of component Graphs and the list of peeled
+    vertices, which extend_coloring uses to recover a coloring of G.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to reduce.
+    k : int
+        The number of available colors.
+    '''
+    core, E, peeled = kcore_reduce(G, k)
+    return split_components(core, E), peeled
+
+def extend_coloring(G, coloring, peeled, k):
+    '''
+    Extends a coloring of the reduced graph back to all of G, by coloring the
+    peeled vertices in the reverse of the order they were removed. Each one
+    gets the smallest color not used by its already-colored neighbors.
+
+    Params
+    ------
+    G : graph.Graph
+        The original, unreduced graph.
+    coloring : dict
+        A dictionary mapping each vertex in the reduced graph to a color.
+    peeled : list
+        The peeled vertices, in the order returned by kcore_reduce.
+    k : int
+        The number of available colors.
+    '''
+    coloring = dict(coloring)
+    indptr, indices = G.get_csr()
+    # The color of each vertex, or -1 if it hasn't been colored yet.
+    colors = np.full(G.vertex_count, -1, dtype=np.int64)
+    if len(coloring) > 0:
+        colored = np.array(list(coloring.keys()), dtype=G.labels.dtype)
+        colors[G.index_of(colored)] = list(coloring.values())
+    for v in reversed(peeled):
+        i = G.index_of(v)
+        used = colors[indices[indptr[i]:indptr[i + 1]]]
+        free = np.ones(k, dtype=bool)
+        free[used[used >= 0]] = False
+        colors[i] = coloring[v] = int(np.argmax(free))
+    return coloring
+
+def _solve_component(args):
+    '''
+    Runs the given algorithm on a single component. This is defined at module
+    level so that it can be sent to worker processes.
+    '''
+    algorithm, G, k, seed, kwargs = args
+    # A component with no more than k vertices can be colored directly.
+    if G.vertex_count <= k:
+        return 0, {v:c for c, v in enumerate(G.V)}
+    solver = algorithm(G, k, seed=seed)
+    iters = solver.run(**kwargs)
+    return iters, solver.coloring
+
+def solve_reduced(G, k, algorithm=TabuCol, processes=None, seed=None, **kwargs):
+    '''
+    Colors G with k colors by reducing it with reduce_graph, running the
+    algorithm on each component of the k-core, and extending the result back
+    to G. Returns the coloring of G, or None if the algorithm failed on any
+    component.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph to color.
+    k : int
+        The number of available colors.
+    algorithm : class
+        The search algorithm to run on each component, e.g. TabuCol or Control.
+    processes : int
+        The number of worker processes to solve components with. If None, the
+        components are solved one after another in this process.
+    seed : None, int, or numpy.random.Generator
+        Seed from which an independent random stream is spawned for each
+        component.
+    kwargs :
+        Keyword arguments which are passed on to the algorithm's run method.
+    '''
+    components, peeled = reduce_graph(G, k)
+    print(f'Reduced graph to {len(components)} components ({len(peeled)}/{G.vertex_count} vertices peeled).')
+
+    seeds = spawn(seed, len(components))
+    jobs = [(algorithm, component, k, s, kwargs) for component, s in zip(components, seeds)]
+    if processes is None or len(jobs) <= 1:
+        results = list(map(_solve_component, jobs))
+    else:
+        with Pool(processes) as pool:
+            results = pool.map(_solve_component, jobs)
+
+    coloring = {}
+    for iters, component_coloring in results:
+        if iters < 0:
+            print('FAILURE: Unable to color one of the components of the reduced graph.')
+            return None
+        coloring.update(component_coloring)
+    return extend_coloring(G, coloring, peeled, k)
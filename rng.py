@@ -0,0 +1,99 @@
+# Helpers for passing explicit random number generators through the solvers
+# and graph generators, so that runs can be reproduced from a seed.
+import numpy as np
+
+def default_rng(seed=None):
+    '''
+    Returns a numpy.random.Generator for the given seed. If seed is already a
+    Generator, it is returned as-is, so that callers can share one stream.
+
+    Params
+    ------
+    seed : None, int, numpy.random.SeedSequence, or numpy.random.Generator
+        The seed to create the Generator from. If None, fresh entropy is
+        pulled from the operating system.
+    '''
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def spawn(seed, n):
+    '''
+    Returns a list of n independent Generators derived from seed, using
+    SeedSequence.spawn. These should be used to seed parallel jobs, so that
+    their random streams don't overlap.
+
+    Params
+    ------
+    seed : None, int, numpy.random.SeedSequence, or numpy.random.Generator
+        The seed to derive the Generators from.
+    n : int
+        The number of Generators to create.
+    '''
+    if isinstance(seed, np.random.Generator):
+        return seed.spawn(n)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [np.random.default_rng(s) for s in seed.spawn(n)]
+
+class RandomBuffer():
+    '''
+    Draws uniform random numbers from a Generator in large blocks, and hands
+    them out a few at a time. This avoids the overhead of a separate call into
+    the Generator every time a hot loop needs a random integer or shuffle.
+    '''
+    def __init__(self, rng, size=4096):
+        self.rng = rng
+        self.size = size
+        self.__refill()
+
+    def __refill(self):
+        self.buffer = self.rng.random(self.size)
+        self.pos = 0
+
+    def random(self, size):
+        '''
+        Returns an array of size uniform random numbers in [0, 1).
+        '''
+        if size > self.size:
+            return self.rng.random(size)
+        if self.pos + size > self.size:
+            self.__refill()
+        x = self.buffer[self.pos:self.pos + size]
+        self.pos += size
+        return x
+
+    def randint(self, high):
+        '''
+        Returns a random integer in [0, high).
+        '''
+        return int(self.random(1)[0] * high)
+
+    def permutation(self, n):
+        '''
+        Returns a random permutation of range(n), as an array.
+        '''
+        return np.argsort(self.random(n), kind='stable')
+
+    def sample(self, n, size):
+        '''
+        Returns size distinct random integers from range(n) (or all of them,
+        if size >= n), as an array in a random order. When size is small
+        compared to n, this uses Floyd's algorithm, which takes O(size) rather
+        than the O(n log n) of a full permutation.
+        '''
+        if 4 * size >= n:
+            return self.permutation(n)[:size]
+        chosen, out = set(), []
+        for j, x in zip(range(n - size, n), self.random(size)):
+            # t is uniform over range(j + 1). If it was already chosen, j
+            # can't have been, so j is taken instead.
+            t = int(x * (j + 1))
+            if t in chosen:
+                t = j
+            chosen.add(t)
+            out.append(t)
+        # Floyd's algorithm picks a uniform random subset, but not in a
+        # uniform random order.
+        out = np.array(out, dtype=np.int64)
+        return out[self.permutation(size)]
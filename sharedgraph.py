@@ -0,0 +1,155 @@
+# Publishes a graph's arrays into a block of shared memory, so that worker
+# processes can attach to it without copying, rather than each being sent its
+# own pickled copy of the graph. The process which publishes the graph owns the
+# block, and is responsible for freeing it with unlink once the workers are
+# done with it.
+import sys
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from graph import Graph
+
+# Each array starts on a multiple of this many bytes within the block.
+ALIGNMENT = 64
+
+# The graphs this process has attached to, by block name, so that a worker
+# which is sent many jobs on the same graph only maps it once.
+_attached = {}
+
+class SharedGraphHandle():
+    '''
+    A small, picklable description of a graph published by SharedGraph, which
+    is what gets sent to worker processes in place of the graph itself.
+    '''
+    def __init__(self, name, n, layout):
+        self.name = name
+        self.n = n
+        # Maps each array name to its (dtype, shape, offset) within the block.
+        self.layout = layout
+
+class SharedGraph():
+    def __init__(self, G):
+        '''
+        Copies the vertex labels, edge arrays and CSR adjacency arrays of G
+        into a new shared memory block. If the bitset adjacency of G has
+        already been built, it is shared as well.
+
+        Params
+        ------
+        G : graph.Graph
+            The graph to publish. Its labels must have a numeric or fixed-width
+            string dtype.
+        '''
+        if G.labels.dtype.hasobject:
+            raise ValueError('Only graphs with numeric or string labels can be shared.')
+        indptr, indices = G.get_csr()
+        arrays = {'labels':G.labels, 'src':G.src, 'dst':G.dst, 'indptr':indptr, 'indices':indices}
+        if G._bits is not None:
+            arrays['bits'] = G._bits
+
+        layout, size = {}, 0
+        for field, array in arrays.items():
+            layout[field] = (array.dtype.str, array.shape, size)
+            size += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+        self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.handle = SharedGraphHandle(self.shm.name, G.vertex_count, layout)
+        for field, array in arrays.items():
+            dtype, shape, offset = layout[field]
+            view = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            view[...] = array
+            # Drop the view, as the block can't be closed while one exists.
+            del view
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        self.unlink()
+
+    def close(self):
+        '''
+        Releases this process's mapping of the block. The block itself stays
+        available to attached workers until unlink is called.
+        '''
+        if self.shm is not None:
+            self.shm.close()
+
+    def unlink(self):
+        '''
+        Frees the shared memory block. Workers which are still attached keep
+        their mappings, but no new process can attach to the graph.
+        '''
+        if self.shm is not None:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                # The block was already removed, e.g. by hand.
+                pass
+            self.shm = None
+
+def _open(name):
+    '''
+    Opens an existing shared memory block without registering it with this
+    process's resource tracker. Otherwise, a worker with its own tracker (e.g.
+    one started before the block was published) would unlink the block when it
+    exits, out from under the process which owns it.
+    '''
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Older versions always register the block. Unregistering it afterwards
+    # isn't enough, as a worker which shares its tracker with the owner would
+    # then remove the owner's registration.
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype : None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+def attach(handle):
+    '''
+    Returns a read-only Graph whose arrays are views of the shared memory block
+    described by handle, without copying them. Attached graphs are cached, so
+    attaching to the same handle again in a process is free.
+
+    Params
+    ------
+    handle : SharedGraphHandle
+        The handle of a graph published by SharedGraph.
+    '''
+    if handle.name not in _attached:
+        shm = _open(handle.name)
+        arrays = {}
+        for field, (dtype, shape, offset) in handle.layout.items():
+            arrays[field] = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+            arrays[field].flags.writeable = False
+        G = Graph.from_arrays(arrays['src'], arrays['dst'], handle.n, labels=arrays['labels'])
+        # The CSR arrays are shared too, so they don't need to be rebuilt.
+        G._csr = (arrays['indptr'], arrays['indices'])
+        G._bits = arrays.get('bits')
+        _attached[handle.name] = (G, shm)
+    return _attached[handle.name][0]
+
+def detach(handle):
+    '''
+    Releases this process's mapping of a graph attached with attach. Any
+    references to the attached graph must be dropped first.
+
+    Params
+    ------
+    handle : SharedGraphHandle
+        The handle of the graph to detach from.
+    '''
+    G, shm = _attached.pop(handle.name)
+    del G
+    shm.close()
+
+def resolve(G):
+    '''
+    Returns G itself, or the attached graph if G is a SharedGraphHandle. Worker
+    functions call this so they can be sent either.
+    '''
+    if isinstance(G, SharedGraphHandle):
+        return attach(G)
+    return G
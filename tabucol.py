@@ -1,10 +1,12 @@
 # The goal is to determine which features of the Tabu-Col algorithm are the
 # most important for performance. 
-import random
 import numpy as np
-import copy
 
-from graph import Graph, flatten
+from rng import default_rng, RandomBuffer
+from bounds import chromatic_lower_bound
+from evaluation import make_evaluator
+from recorder import TABU, ASPIRATED, STUCK
+from moves import SingleMove
 
 def state_to_coloring(s):
     '''
@@ -17,122 +19,133 @@ def state_to_coloring(s):
             coloring[v] = i
     return coloring
 
-def apply_move(s, move):
+def state_to_colors(G, s):
     '''
-    Take a move, represented by a vertex-coloring group pair, and applies it
-    to a state. 
+    Converts a Tabu-Col state to an array holding the color of each vertex,
+    ordered like the vertices of G. 
     '''
-    s_prime = copy.deepcopy(s)
-    v, c = move
-    for group in s_prime:
-        if v in group:
-            group.remove(v)
-    s_prime[c].append(v)
-    return s_prime
+    colors = np.zeros(G.vertex_count, dtype=np.int64)
+    for (i, group) in enumerate(s):
+        colors[G.index_of(np.asarray(group, dtype=G.labels.dtype))] = i
+    return colors
+
+def colors_to_state(G, colors, k):
+    '''
+    Converts an array holding the color of each vertex of G back to a Tabu-Col
+    state, represented as a list of lists of vertex labels. 
+    '''
+    return [G.labels[colors == i].tolist() for i in range(k)]
 
 class TabuCol():
-    def __init__(self, G, k):
+    def __init__(self, G, k, seed=None):
         self.G = G
         self.k = k
+        # All randomness is drawn from self.rng, so runs can be reproduced.
+        self.rng = default_rng(seed)
+        self.buffer = RandomBuffer(self.rng)
+        self.bound = None
+        # Conflicts are counted with bit operations on dense graphs, and with
+        # the CSR adjacency arrays otherwise. 
+        self.evaluator = make_evaluator(G, k)
      
     def __init_s(self):
         '''
-        Creates an initial state.
+        Creates an initial state, as an array holding the color of each vertex.
         '''
-        s0 = [[] for i in range(self.k)]
-        for v in self.G.V: # Add each vertex to a random coloring group.
-            idx = random.randint(0, self.k - 1)
-            s0[idx] += [v]
-        return s0
+        # Add each vertex to a random coloring group.
+        return self.rng.integers(0, self.k, size=self.G.vertex_count)
     
     def f(self, s):
         '''
         The objective function f of the Tabu-Col algorithm. It is defined as the
-        number of edges for which both vertices are in the same coloring group. 
+        number of vertices which share a coloring group with a neighbor. 
         
         Params
         -----
         state : list
             A list of lists representing the state of the system. 
         '''
-        coloring = state_to_coloring(s)
-        return len(self.G.get_conflicting_vertices(coloring))
+        return self.evaluator.objective(state_to_colors(self.G, s))
     
-    def update_A(self, s, s_prime):
+    def update_A(self, z, f_prime):
         '''
-        Update the value of the aspiration funtion for a given s and s_prime
-        (i.e. a state and its neighbor). Note that this function assumes that
-        the requirements for updating have been met, and throws an assertion
-        error if otherwise. 
+        Update the value of the aspiration funtion for a state with objective
+        value z, given a neighbor with objective value f_prime. Note that this
+        function assumes that the requirements for updating have been met. 
+        The aspiration function is stored as an array indexed by objective
+        value, so this is O(1). 
 
         Params
         ------
-        s : list
-            A list of lists representing the current state of the system. 
-        s_prime : list
-            A list of lists representing a neighboring state of s. 
+        z : int
+            The value of f for the current state. 
+        f_prime : int
+            The value of f for a neighboring state. 
         '''
-        z = self.f(s)
-        self.A[z] = self.f(s_prime) - 1
+        self.A[z] = f_prime - 1
 
-    def __get_possible_moves(self, s):
+    def __get_operators(self):
         '''
-        Generate a list of all moves from the current state, i.e. all moves
-        which bring a conflicting vertex out of its current coloring group. 
+        Returns the move operators in the order they should be tried this
+        iteration. The first is picked at random according to self.weights,
+        and the rest follow in case it can't produce any valid moves. 
         '''
-        # First, get a list of all conflicting vertices.
-        coloring = state_to_coloring(s)
-        conflicting = self.G.get_conflicting_vertices(coloring)
-        
-        possible_moves = []
-        for v in conflicting:
-            possible_colors = np.delete(np.arange(self.k), coloring[v])
-            possible_moves += [(v, c) for c in possible_colors]
-        return possible_moves
+        if len(self.operators) == 1:
+            return self.operators
+        cdf = np.cumsum(self.weights) / np.sum(self.weights)
+        first = min(int(np.searchsorted(cdf, self.buffer.random(1)[0], side='right')), len(cdf) - 1)
+        return [self.operators[first]] + self.operators[:first] + self.operators[first + 1:]
 
-    def __get_moves(self, s):
+    def __get_moves(self):
         '''
-        Gets a list of valid moves, given the features which are turned on. 
- 
-        Params
-        ------
-        s : list
-            The current state, represented as a list of lists. 
-        A_on : bool
-            Boolean indicating whether or not to make use of the aspiration
-            function. 
-        T_on : bool
-            Boolean indicating whether or not to make use of the Tabu list. 
+        Gets a list of up to self.rep valid moves from the current state. Each
+        is given along with the operator which produced it, the change in f it
+        would cause, and whether or not it was let through by the aspiration
+        function. A move is valid if it is not in the Tabu list, or if it
+        satisfies the aspiration function. 
         '''
         # Get the key for the current state.
-        z = self.f(s)
+        z = self.evaluator.f
  
-        possible_moves = self.__get_possible_moves(s)
-        random.shuffle(possible_moves)
-        
-        moves = []
-        for move in possible_moves:
-            if len(moves) == self.rep:
-                break
-            s_prime = apply_move(s, move)
-            if move not in self.T:
-                moves.append(move)
-                # Every time a state s_prime is generated which meets this
-                # condition, update the value of the aspiration function. 
-            elif self.f(s_prime) <= self.A.get(z, z - 1):
-                self.update_A(s, s_prime)
-                moves.append(move)
-        return moves
+        for operator in self.__get_operators():
+            moves = []
+            for move in operator.candidates(self.evaluator, self.buffer, self.rep):
+                delta = operator.delta(self.evaluator, move)
+                if move[0] not in self.T:
+                    moves.append((operator, move, delta, False))
+                    # Every time a state s_prime is generated which meets this
+                    # condition, update the value of the aspiration function. 
+                elif self.aspiration == 'level' and z + delta <= self.A[z]:
+                    self.update_A(z, z + delta)
+                    moves.append((operator, move, delta, True))
+                elif self.aspiration == 'best' and z + delta < self.best_f:
+                    moves.append((operator, move, delta, True))
+                # Stop as soon as there are enough, so the operator isn't asked
+                # for more candidates than it needs to generate. If every move
+                # of the operator has the same delta, the first one will do.
+                if len(moves) == self.rep or (operator.constant_delta and len(moves) > 0):
+                    break
+            if len(moves) > 0:
+                return moves
+        return []
    
     def run(self, 
             maxiters=1000,
             T_size=10,
-            rep=10):
+            rep=10,
+            check_bound=True,
+            s0=None,
+            recorder=None,
+            adaptive=False,
+            aspiration='level',
+            operators=None,
+            weights=None):
         '''
         Run the TabuCol algorithm on self.G for self.k colors. Returns -1 if the
         algorithm gets stuck (no new moves can be generated), -2 if the maximum
-        number of iterations is reached, and the number of iterations if the
-        algorithm is successful. 
+        number of iterations is reached, -3 if self.k is below a lower bound on
+        the chromatic number of self.G (so no search is done), and the number
+        of iterations if the algorithm is successful. 
  
         Params
         ------
@@ -144,39 +157,157 @@ class TabuCol():
             an error will be thrown. 
         rep : int
             The number of neighbors to consider at each iteration. 
+        check_bound : bool
+            Whether or not to check self.k against a clique lower bound before
+            searching. The bound is computed once per TabuCol object. 
+        s0 : list
+            The state to start the search from, as a list of lists. If None, a
+            random initial state is generated. 
+        recorder : recorder.TraceRecorder
+            If given, the chosen move, objective value, tabu status and number
+            of candidates are recorded at every iteration. 
+        adaptive : bool
+            Whether or not to adjust rep and T_size during the run, in which
+            case the given values are used as starting points. See __adapt. 
+        aspiration : str
+            The aspiration criterion used to let tabu moves through. With
+            'level', a tabu move from a state with objective value z is allowed
+            if it reaches A(z), which is then lowered (Hertz and de Werra).
+            With 'best', a tabu move is allowed if it would beat the best
+            value of f found so far. With None, tabu moves are never allowed. 
+        operators : list
+            The move operators to use (see moves.py). Defaults to only
+            moves.SingleMove, which recolors one conflicting vertex. 
+        weights : list
+            The relative probability of each operator being tried first in an
+            iteration. Defaults to equal weights. 
         '''
+        if aspiration not in ('level', 'best', None):
+            raise ValueError(f"aspiration must be 'level', 'best' or None, not {aspiration!r}.")
+        if operators is not None and all(operator.constant_delta for operator in operators):
+            raise ValueError('The operators never change f, so at least one operator whose moves can (e.g. moves.SingleMove) is needed.')
+        if check_bound:
+            if self.bound is None:
+                self.bound = chromatic_lower_bound(self.G)
+            if self.k < self.bound:
+                print(f'FAILURE: G contains a clique of size {self.bound}, so it cannot be colored with {self.k} colors.')
+                self.coloring = None
+                return -3
+
         # Initialize all local variables and relevant attributes. 
         self.rep = rep
-        s = self.__init_s()
-        self.A = {}
-        self.T = []
-        self.T = random.sample(flatten([(v, c) for v in self.G.V for c in range(self.k)]), T_size)
+        self.T_size = T_size
+        self.operators = [SingleMove()] if operators is None else list(operators)
+        self.weights = [1] * len(self.operators) if weights is None else weights
+        colors = self.__init_s() if s0 is None else state_to_colors(self.G, s0)
+        self.evaluator.reset(colors)
+        if adaptive:
+            self.__init_adaptive()
+        self.aspiration = aspiration
+        # A[z] starts at z - 1 for every objective value z in [0, |V|]. 
+        self.A = np.arange(-1, self.G.vertex_count, dtype=np.int64)
+        self.best_f = self.evaluator.f
+        # Moves are stored as (vertex index, color) pairs. 
+        pairs = self.rng.choice(self.G.vertex_count * self.k, T_size, replace=False)
+        self.T = [(int(i) // self.k, int(i) % self.k) for i in pairs]
 
         iters = 0
-        while self.f(s) > 0 and iters < maxiters:
+        while self.evaluator.f > 0 and iters < maxiters:
             print(f'{iters} TabuCol iterations completed.', end='\r')
             # Get a list of self.rep possible moves. 
-            moves = self.__get_moves(s)
+            moves = self.__get_moves()
             if len(moves) == 0:
                 # If no moves could be generated, the algorithm is stuck. 
                 print('FAILURE: TabuCol was unable to generate any new moves.')
+                if recorder is not None:
+                    recorder.record(iters, -1, -1, self.evaluator.f, 0, STUCK)
+                self.__store_result()
                 return -1    
  
-            g = lambda move : self.f(apply_move(s, move)) 
-            move = min(moves, key=g)
-            s = apply_move(s, move)
+            operator, move, delta, aspirated = min(moves, key=lambda m : m[2])
+            old = [int(self.evaluator.colors[v]) for v, c in move]
+            operator.apply(self.evaluator, move)
+            self.best_f = min(self.best_f, self.evaluator.f)
+            if recorder is not None:
+                flags = TABU | ASPIRATED if aspirated else 0
+                recorder.record(iters, move[0][0], move[0][1], self.evaluator.f, len(moves), flags)
  
+            if adaptive:
+                self.__adapt(iters, move, old)
+
             # Update the Tabu list by adding the most recent move, and removing
-            # the last move. 
-            self.T = [move] + self.T[:-1]
+            # the last move (or more, if T_size has shrunk). 
+            self.T = [move[0]] + self.T[:max(self.T_size - 1, 0)]
             
             iters += 1
         
+        self.__store_result()
         if iters >= maxiters:
             print(f'FAILURE: TabuCol was unable to find a solution within {maxiters} iterations.')
             return -2
         else:
             print(f'SUCCESS: TabuCol found a solution in {iters} iterations.')
             return iters
-             
 
+    def __init_adaptive(self):
+        '''
+        Sets up the state used by __adapt, starting from the current values of
+        self.rep and self.T_size. 
+        '''
+        n = self.G.vertex_count
+        self.base_rep, self.base_T = self.rep, self.T_size
+        self.max_rep = 8 * self.rep
+        self.best = self.evaluator.f
+        self.stagnation = 0
+        self.extra_T = 0
+        # Each coloring is hashed as the XOR of a random key for each of its
+        # (vertex, color) pairs, so the hash can be updated in O(1) per move. 
+        self.zobrist = self.rng.integers(0, 2**62, size=(n, self.k))
+        self.hash = int(np.bitwise_xor.reduce(self.zobrist[np.arange(n), self.evaluator.colors]))
+        self.seen = {}
+
+    def __adapt(self, iters, move, old):
+        '''
+        Adjusts self.rep and self.T_size after a move, where old holds the
+        colors the moved vertices had before it.
+
+        The tenure follows Galinier and Hao, T_size = L + 0.6 * F, where F is
+        the number of conflicting vertices and L is the T_size given to run,
+        plus an extra term which grows by one whenever the search revisits a
+        coloring (i.e. it is cycling), decays by 1% every iteration, and is
+        halved whenever f improves. T_size is capped at half the number of
+        candidate moves, (k - 1) * F / 2 (but at least 1), so that the Tabu
+        list can't cover every move, and never exceeds n * k / 2. The number
+        of neighbors considered doubles every n iterations without improvement,
+        up to 8 * rep, and drops back to rep on improvement. 
+        '''
+        f = self.evaluator.f
+        for (v, c), a in zip(move, old):
+            self.hash ^= int(self.zobrist[v, a]) ^ int(self.zobrist[v, c])
+        self.extra_T *= 0.99
+        if self.hash in self.seen:
+            self.extra_T += 1
+        self.seen[self.hash] = iters
+        # Only remember recent colorings. 
+        if len(self.seen) > 100 * self.G.vertex_count:
+            self.seen = {}
+
+        if f < self.best:
+            self.best = f
+            self.stagnation = 0
+            self.rep = self.base_rep
+            self.extra_T /= 2
+        else:
+            self.stagnation += 1
+            if self.stagnation % self.G.vertex_count == 0:
+                self.rep = min(2 * self.rep, self.max_rep)
+        cap = min(max(1, (self.k - 1) * f // 2), self.G.vertex_count * self.k // 2)
+        self.T_size = min(self.base_T + int(0.6 * f + self.extra_T), cap)
+
+    def __store_result(self):
+        '''
+        Store the final state, so the coloring can be recovered by the caller. 
+        '''
+        colors = self.evaluator.colors
+        self.s = colors_to_state(self.G, colors, self.k)
+        self.coloring = dict(zip(self.G.V, colors.tolist()))
@@ -9,12 +9,21 @@ import pandas as pd
 from tabucol import TabuCol
 from randomgraph import RandomGraph
 from graph import Graph, flatten, remove_duplicate_edges
+from rng import default_rng, spawn
+from cache import seed_key
 
-def reproduce_hdw_table2():
+def reproduce_hdw_table2(seed=None):
     '''
     Trying to reproduce the table displayed in Hertz and de Werra's 1987
     article. 
+
+    Params
+    ------
+    seed : None, int, or numpy.random.Generator
+        Seed used to generate the graphs and run TabuCol, so that the table
+        can be reproduced. 
     '''
+    rng = default_rng(seed)
     # Used edge probability 0.5 for these. 
     p = 0.5
 
@@ -33,8 +42,8 @@ def reproduce_hdw_table2():
         x = []
         for i in range(num): # Number of graphs in the sample. 
             print(f'Generating results for n={n} graph {i}/{num}')
-            G = generate_colorable_graph(X, n, p)
-            tc = TabuCol(G, k)
+            G = generate_colorable_graph(X, n, p, seed=rng)
+            tc = TabuCol(G, k, seed=rng)
             iters = tc.run(rep=rep, maxiters=1000000, T_size=7)
             if iters < 0:
                 raise Exception('Shit\'s fucked')
@@ -109,7 +118,7 @@ def reproduce_hdw_table2():
 #         return [l1] + random_split(l2, k - 1)
 #         
 
-def generate_colorable_graph(k, n, p):
+def generate_colorable_graph(k, n, p, seed=None, cache=None):
     '''
     Generates a single colorable G(n, p) graphs. 
 
@@ -121,13 +130,30 @@ def generate_colorable_graph(k, n, p):
         Number of vertices in the graph. 
     p : float
         Edge probability for the graph. 
+    seed : None, int, or numpy.random.Generator
+        Seed for the random number generator used to draw the graphs. 
+    cache : cache.InstanceCache
+        If given, SAT results are memoized in the cache. If the seed is an int
+        or SeedSequence, the generated graph is stored too, and loaded instead
+        of regenerated next time. 
     '''
-    g = RandomGraph(n, p)
-    while not g.is_colorable(k):
-        g = RandomGraph(n, p)
+    key = None if cache is None or seed_key(seed) is None else f'colorable/{k}/{n}/{p}/{seed_key(seed)}'
+    if key is not None:
+        g = cache.get_instance(key)
+        if g is not None:
+            return g
+
+    is_colorable = (lambda g : g.is_colorable(k)) if cache is None else (lambda g : cache.is_colorable(g, k))
+    rng = default_rng(seed)
+    g = RandomGraph(n, p, seed=rng)
+    while not is_colorable(g):
+        g = RandomGraph(n, p, seed=rng)
+
+    if key is not None:
+        cache.put_instance(key, g)
     return g
 
-def generate_colorable_graphs(k, n, p,  num=100):
+def generate_colorable_graphs(k, n, p,  num=100, seed=None, cache=None):
     '''
     Generate num RandomGraphs with the specified parameters. Uses the
     generate_colorable_graphs function. 
@@ -142,13 +168,99 @@ def generate_colorable_graphs(k, n, p,  num=100):
         Edge probability for the graph. 
     num : int
         Number of random graphs to generate. 
+    seed : None, int, or numpy.random.Generator
+        Seed from which an independent random stream is spawned for each
+        graph. 
+    cache : cache.InstanceCache
+        Cache passed on to generate_colorable_graph. 
     '''
+    # Child SeedSequences (rather than Generators) are passed down when
+    # possible, as they identify each graph for the cache. 
+    if isinstance(seed, int):
+        seeds = np.random.SeedSequence(seed).spawn(num)
+    else:
+        seeds = spawn(seed, num)
     graphs = []
-    for i in range(num):
-        g = generate_colorable_graph(k, n, p)
+    for i, rng in enumerate(seeds):
+        g = generate_colorable_graph(k, n, p, seed=rng, cache=cache)
         print(f'{i} out of {num} graphs generated.', end='\r')
         graphs.append(g)
     return graphs
+
+def run_trials(k, graphs, algorithm=TabuCol, seed=None, **kwargs):
+    '''
+    Runs the algorithm once on each graph, and returns the list of results
+    (the number of iterations, or a negative failure code). 
+
+    Params
+    ------
+    k : int
+        K value, the number of colors to use in the coloring problem. 
+    graphs : list
+        A list of graph.Graph objects to run the algorithm on. 
+    algorithm : class
+        The search algorithm to run, e.g. TabuCol, Control or PartialCol. 
+    seed : None, int, or numpy.random.Generator
+        Seed from which an independent random stream is spawned for each run. 
+    kwargs :
+        Keyword arguments which are passed on to the algorithm's run method. 
+    '''
+    return [algorithm(G, k, seed=rng).run(**kwargs) for G, rng in zip(graphs, spawn(seed, len(graphs)))]
+
+def tune_successive_halving(k, graphs, configs, maxiters=1000, eta=2, min_graphs=2, seed=None):
+    '''
+    Picks the best of a set of run configurations (e.g. values of T_size and
+    rep) by successive halving, rather than running every configuration on
+    every graph with the full iteration budget. In each round, the surviving
+    configurations are run on a subset of the graphs with a fraction of
+    maxiters, and only the best 1/eta of them go on to the next round, where
+    the number of graphs and iterations are both multiplied by eta. 
+
+    A configuration is scored by its mean iteration count, with failed runs
+    counted as twice the iteration budget for the round. Returns the best
+    configuration and a DataFrame of every run made. 
+
+    Params
+    ------
+    k : int
+        K value, the number of colors to use in the coloring problem. 
+    graphs : list
+        A list of graph.Graph objects to tune on. 
+    configs : list
+        A list of dictionaries of keyword arguments for TabuCol.run. 
+    maxiters : int
+        The iteration budget used in the final round. 
+    eta : int
+        The factor by which the number of configurations is cut each round. 
+    min_graphs : int
+        The number of graphs used in the first round. 
+    seed : None, int, or numpy.random.Generator
+        Seed used to order the graphs and run TabuCol. 
+    '''
+    rng = default_rng(seed)
+    graphs = [graphs[i] for i in rng.permutation(len(graphs))]
+    rounds = max(1, math.ceil(math.log(len(configs), eta)))
+    survivors = list(range(len(configs)))
+
+    rows = []
+    for r in range(rounds):
+        # Early rounds are cheap: few graphs, and a small iteration budget. 
+        scale = eta ** (rounds - 1 - r)
+        budget = max(1, maxiters // scale)
+        sample = graphs[:min(len(graphs), min_graphs * eta ** r)]
+        print(f'Successive halving round {r}: {len(survivors)} configs, {len(sample)} graphs, maxiters={budget}')
+
+        scores = []
+        for i in survivors:
+            results = run_trials(k, sample, seed=rng, maxiters=budget, **configs[i])
+            penalized = [x if x >= 0 else 2 * budget for x in results]
+            scores.append(np.mean(penalized))
+            rows += [{'round':r, 'config':i, 'maxiters':budget, 'iters':x, **configs[i]} for x in results]
+
+        keep = max(1, len(survivors) // eta)
+        survivors = [survivors[j] for j in np.argsort(scores, kind='stable')[:keep]]
+
+    return configs[survivors[0]], pd.DataFrame(rows)
  
 
 # def generate_colorable_graphs_petford_and_welsh(k, n, num=100, p=0.5):
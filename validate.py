@@ -0,0 +1,129 @@
+# Checks colorings in bulk. Many colorings of the same graph are held as the
+# rows of a 2-D array of colors, and checked against the edge arrays of the
+# graph all at once, rather than one coloring dictionary at a time.
+import os
+import numpy as np
+import pandas as pd
+
+# The number of bytes of temporary arrays held at once while checking. Each
+# (coloring, edge) pair compared needs the colors of both of its ends gathered
+# from the colorings, and a Boolean for the result.
+BLOCK_SIZE = 2**26
+
+def check_colorings(G, colorings, k=None):
+    '''
+    Checks each row of colorings, which holds the color of every vertex of G
+    ordered like G.labels (see Graph.coloring_to_array). Returns a pair of
+    arrays with one entry per coloring: the number of edges in conflict, and
+    the index (into G.src and G.dst) of the first of them, or -1 if there are
+    none. If k is given, a coloring which uses a color outside 0, ..., k - 1
+    is also counted as having a conflict, with a first edge of -1 if its
+    edges are otherwise fine.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph the colorings are for.
+    colorings : np.ndarray
+        A (num, n) array of colors, or a single coloring of length n.
+    k : int
+        The number of colors the colorings are allowed to use.
+    '''
+    colorings = np.atleast_2d(colorings)
+    if colorings.shape[1] != G.vertex_count:
+        raise ValueError(f'Colorings have {colorings.shape[1]} colors, but G has {G.vertex_count} vertices.')
+    num = len(colorings)
+    conflicts = np.zeros(num, dtype=np.int64)
+    first = np.full(num, -1, dtype=np.int64)
+
+    # The gathered colors are the largest temporaries, so gather them from the
+    # smallest integer dtype which holds every color given.
+    if colorings.size > 0 and np.issubdtype(colorings.dtype, np.integer):
+        dtype = np.result_type(np.min_scalar_type(colorings.min()), np.min_scalar_type(colorings.max()))
+        colorings = colorings.astype(dtype, copy=False)
+
+    # Go through the edges in blocks, so that the colors gathered for a block
+    # and the comparisons between them take up at most BLOCK_SIZE bytes.
+    step = max(1, BLOCK_SIZE // (max(num, 1) * (2 * colorings.itemsize + 1)))
+    for start in range(0, G.edge_count, step):
+        src, dst = G.src[start:start + step], G.dst[start:start + step]
+        same = colorings[:, src] == colorings[:, dst]
+        counts = same.sum(axis=1)
+        # Only colorings with no conflict in an earlier block get a first edge
+        # from this one.
+        new = (counts > 0) & (first < 0)
+        first[new] = start + same[new].argmax(axis=1)
+        conflicts += counts
+
+    if k is not None:
+        conflicts += ((colorings < 0) | (colorings >= k)).any(axis=1)
+    return conflicts, first
+
+def report(G, conflicts, first, offset=0):
+    '''
+    Puts the results of check_colorings in a DataFrame, with one row per
+    coloring, and the first offending edge given by its vertex labels.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph the colorings were checked against.
+    conflicts : np.ndarray
+        The number of conflicts in each coloring.
+    first : np.ndarray
+        The index of the first edge in conflict in each coloring, or -1.
+    offset : int
+        The row number of the first coloring, when checking in chunks.
+    '''
+    has_edge = first >= 0
+    u = np.full(len(first), None, dtype=object)
+    v = np.full(len(first), None, dtype=object)
+    u[has_edge] = G.labels[G.src[first[has_edge]]].tolist()
+    v[has_edge] = G.labels[G.dst[first[has_edge]]].tolist()
+    return pd.DataFrame({'row':np.arange(offset, offset + len(first)),
+                         'valid':conflicts == 0,
+                         'conflicts':conflicts,
+                         'first_u':u,
+                         'first_v':v})
+
+def check_file(G, path, k=None, chunksize=10000):
+    '''
+    Checks the colorings stored in a file, a chunk of chunksize colorings at a
+    time, so that the whole file never has to be loaded into memory. Returns a
+    DataFrame with one row per coloring, as given by report.
+
+    Two formats are read:
+        - .npy files holding a (num, n) array of colors, ordered like
+          G.labels. These are memory-mapped, rather than read in.
+        - CSV files with one row per coloring, and a column for each vertex
+          named by its label. Any other columns (e.g. the algorithm or the
+          number of iterations) are ignored.
+
+    Params
+    ------
+    G : graph.Graph
+        The graph the colorings are for.
+    path : str
+        The file the colorings are stored in.
+    k : int
+        The number of colors the colorings are allowed to use.
+    chunksize : int
+        The number of colorings checked at once.
+    '''
+    if os.path.splitext(path)[1] == '.npy':
+        colorings = np.load(path, mmap_mode='r')
+        chunks = (np.asarray(colorings[i:i + chunksize]) for i in range(0, len(colorings), chunksize))
+    else:
+        columns = [str(v) for v in G.V]
+        wanted = set(columns)
+        reader = pd.read_csv(path, usecols=lambda c : c in wanted, dtype=np.int64, chunksize=chunksize)
+        chunks = (chunk[columns].to_numpy() for chunk in reader)
+
+    results, offset = [], 0
+    for chunk in chunks:
+        conflicts, first = check_colorings(G, chunk, k=k)
+        results.append(report(G, conflicts, first, offset=offset))
+        offset += len(chunk)
+    if len(results) == 0:
+        return report(G, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    return pd.concat(results, ignore_index=True)